@@ -0,0 +1,78 @@
+"""
+Compares per-invoice PDF render time with and without the cached layout
+template.
+
+    python benchmarks/bench_pdf_template.py [--invoices 200] [--items 10]
+
+"uncached" builds a fresh InvoiceTemplate for every invoice, which is what
+generate_pdf used to do (stylesheet, TableStyles and column widths rebuilt
+each time); "cached" reuses the shared template. The two modes alternate
+invoice by invoice, so drift in machine speed affects both alike, and PDFs
+are written to memory so disk speed does not affect the comparison.
+
+The template only saves that setup, a fraction of a millisecond per
+invoice; reportlab's layout and PDF writing are most of a render. Expect a
+gain of about 5% on small invoices and less (within noise) on large ones.
+"""
+import argparse
+import io
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from invoice_core import invoice_from_record
+from invoice_pdf import InvoiceTemplate, default_template
+
+
+def sample_invoice(items, discount_percent):
+    """Returns an invoice dict with `items` line items."""
+    return invoice_from_record({
+        'doctor_name': "Dr. Benchmark",
+        'date': "01-10-2025",
+        'discount_percent': discount_percent,
+        'items': [
+            {'product': f"Product {i}", 'packing': "10x10", 'batch_no': f"B{i:05d}",
+             'qty': str(1 + i % 7), 'free': '0', 'rate': f"{10 + i % 50}.50", 'gst': '12'}
+            for i in range(items)
+        ],
+    })
+
+
+def time_renders(invoices, modes):
+    """
+    Renders every invoice once per mode, alternating between the modes;
+    returns {mode: per-invoice times in milliseconds}.
+    """
+    times = {mode: [] for mode in modes}
+    for data in invoices:
+        for mode, get_template in modes.items():
+            start = time.perf_counter()
+            get_template().render(data, io.BytesIO())
+            times[mode].append((time.perf_counter() - start) * 1000)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare PDF render time with and without the cached template.")
+    parser.add_argument('--invoices', type=int, default=200, help="invoices to render per mode (default: 200)")
+    parser.add_argument('--items', type=int, default=10, help="line items per invoice (default: 10)")
+    args = parser.parse_args(argv)
+
+    # Alternate the discount so both totals-table variants are exercised
+    invoices = [sample_invoice(args.items, '5' if i % 2 else '0') for i in range(args.invoices)]
+    default_template()  # Warm up imports and fonts outside the measurement
+
+    results = time_renders(invoices, {'uncached': InvoiceTemplate, 'cached': default_template})
+    print(f"{args.invoices} invoices x {args.items} items")
+    print(f"{'mode':<10}{'median (ms)':>14}{'mean (ms)':>12}{'total (s)':>12}")
+    for mode, times in results.items():
+        print(f"{mode:<10}{statistics.median(times):>14.2f}{statistics.mean(times):>12.2f}{sum(times) / 1000:>12.2f}")
+    uncached, cached = statistics.median(results['uncached']), statistics.median(results['cached'])
+    print(f"cached template saves {uncached - cached:.2f} ms per invoice ({(uncached - cached) / uncached:.1%}, median)")
+
+
+if __name__ == "__main__":
+    main()
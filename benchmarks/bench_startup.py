@@ -0,0 +1,107 @@
+"""
+Measures cold-start time of the desktop app, each run in a fresh interpreter.
+
+    python benchmarks/bench_startup.py [--runs 10]
+
+Reports the median of:
+  * interpreter     - starting Python and exiting, as a floor for the others
+  * import app      - importing handinvoice
+  * eager libraries - importing reportlab.platypus, reportlab.lib.styles and
+                      tkcalendar, i.e. what the app used to load before its window
+  * first paint     - importing handinvoice, building InvoiceApp and drawing it
+                      once (skipped when no display is available)
+
+Every run gets an empty app data folder, so no autosave left by an earlier
+run asks to be restored, and the app's modules are byte-compiled first, as
+for an installed app, even where PYTHONDONTWRITEBYTECODE is set. The
+bytecode goes to a temporary PYTHONPYCACHEPREFIX, not into the source tree.
+"""
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Each snippet prints its own elapsed time in seconds, measured in-process.
+SNIPPETS = {
+    'interpreter': "import time; print(0.0)",
+    'import app': (
+        "import time; t = time.perf_counter(); import handinvoice; "
+        "print(time.perf_counter() - t)"
+    ),
+    'eager libraries': (
+        "import time; t = time.perf_counter(); "
+        "import reportlab.platypus, reportlab.lib.styles, tkcalendar; "
+        "print(time.perf_counter() - t)"
+    ),
+    'first paint': (
+        "import time; t = time.perf_counter(); import handinvoice; "
+        "app = handinvoice.InvoiceApp(); app.update(); "
+        "print(time.perf_counter() - t); app.destroy()"
+    ),
+}
+
+
+def run_snippet(code, pycache_prefix):
+    """Runs a snippet in a new interpreter; returns (in-process seconds, process seconds)."""
+    with tempfile.TemporaryDirectory(prefix='simpleinvoice-startup-') as home:
+        env = dict(os.environ, SIMPLEINVOICE_HOME=home, PYTHONPYCACHEPREFIX=pycache_prefix)
+        start = time.perf_counter()
+        result = subprocess.run(
+            [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+        )
+        process_seconds = time.perf_counter() - start
+    return float(result.stdout.strip().splitlines()[-1]), process_seconds
+
+
+def has_display():
+    """Returns True if a Tk root window can be created."""
+    result = subprocess.run(
+        [sys.executable, "-c", "import tkinter; tkinter.Tk().destroy()"],
+        capture_output=True,
+    )
+    return result.returncode == 0
+
+
+def measure(runs):
+    """Returns {name: (median in-process ms, median process ms)} for every snippet that can run."""
+    results = {}
+    display = has_display()
+    with tempfile.TemporaryDirectory(prefix='simpleinvoice-pycache-') as pycache_prefix:
+        # compileall writes wherever sys.pycache_prefix points
+        previous_prefix, sys.pycache_prefix = sys.pycache_prefix, pycache_prefix
+        try:
+            compileall.compile_dir(ROOT, maxlevels=0, quiet=1)
+        finally:
+            sys.pycache_prefix = previous_prefix
+        for name, code in SNIPPETS.items():
+            if name == 'first paint' and not display:
+                continue
+            samples = [run_snippet(code, pycache_prefix) for _ in range(runs)]
+            results[name] = (
+                statistics.median(s[0] for s in samples) * 1000,
+                statistics.median(s[1] for s in samples) * 1000,
+            )
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure the desktop app's cold-start time.")
+    parser.add_argument('--runs', type=int, default=10, help="runs per measurement (default: 10)")
+    args = parser.parse_args(argv)
+
+    results = measure(args.runs)
+    print(f"{'measurement':<18}{'in-process (ms)':>18}{'whole process (ms)':>22}")
+    for name, (in_process, process) in results.items():
+        print(f"{name:<18}{in_process:>18.1f}{process:>22.1f}")
+    if 'first paint' not in results:
+        print("(first paint skipped: no display available)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,346 @@
+"""
+Benchmark suite for the hot paths, with JSON output and a baseline check.
+
+    python benchmarks/run_benchmarks.py [--quick] [--output results.json]
+                                        [--baseline benchmarks/baseline.json]
+                                        [--save-baseline] [--threshold 0.25]
+
+Cases (sizes are item counts):
+  * core.*    - the GUI-free item store: a cell edit plus the totals refresh
+                done by update_totals, a full recompute, adding and removing
+                a row and collecting the invoice data, at 10/100/1k/10k items.
+                The *_cold cases use a different qty and rate on every row
+                and clear the parse cache first, as for a freshly imported
+                invoice: a recompute, and loading plus collecting the data.
+                core.recompute_float is that recompute with the float
+                calculation used before money was exact; if the fastest
+                cold run is slower than the fastest float run beyond
+                `threshold` the exit status is 1
+  * gui.*     - the same through InvoiceApp: update_totals, add_item_row,
+                remove_last_item_row and _get_invoice_data. These need a
+                display; run the suite under `xvfb-run` on a headless machine,
+                otherwise they are skipped and the output says GUI coverage
+                is missing. The stored baseline was recorded without a
+                display, so it has no gui.* entries
+  * pdf.*     - generate_pdf end to end without the dialogs: invoice data,
+                validation and the PDF written to disk, small and large invoice
+  * startup.* - cold start in a fresh interpreter (see bench_startup.py)
+
+Every case reports the median and minimum of several runs in milliseconds.
+With --baseline, cases whose median is more than `threshold` slower than
+the baseline are listed as regressions and the exit status is 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+from datetime import datetime
+from itertools import repeat
+from math import fsum
+from operator import mul, truediv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+# Keep the app's autosave, catalog and invoice database out of the user's data folder
+os.environ['SIMPLEINVOICE_HOME'] = tempfile.mkdtemp(prefix='simpleinvoice-bench-')
+
+import bench_startup
+from bench_pdf_template import sample_invoice
+from invoice_core import (
+    CALC_KEYS, NUMERIC_KEYS, LineItemStore, clear_parse_cache, format_amount, item_values,
+    make_invoice_data, validate_invoice,
+)
+
+SIZES = (10, 100, 1000, 10000)
+PDF_SIZES = (10, 1000)
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Cases faster than this (ms) are too noisy to call a regression.
+NOISE_FLOOR_MS = 0.05
+
+
+def time_case(run, runs, setup=None):
+    """Times `run()` `runs` times (calling `setup()` untimed before each); returns the stats dict."""
+    times = []
+    for _ in range(runs):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        run()
+        times.append((time.perf_counter() - start) * 1000)
+    return {'median_ms': statistics.median(times), 'min_ms': min(times), 'runs': runs}
+
+
+def sample_items(count):
+    """Returns `count` item dicts for the store."""
+    return [item_values(row) for row in sample_invoice(count, '0')['items']]
+
+
+def distinct_items(count):
+    """Returns `count` item dicts with (nearly) no qty or rate text repeated."""
+    return [
+        {'product': f"Product {i}", 'qty': str(1 + i * 7 % 997), 'rate': f"{1 + i * 37 % 100000 / 100:.2f}",
+         'gst': ('5', '12', '18')[i % 3]}
+        for i in range(count)
+    ]
+
+
+def core_cases(sizes, runs):
+    results = {}
+    for size in sizes:
+        store = LineItemStore()
+        store.extend(sample_items(size))
+        middle = size // 2
+        edits = iter(range(10 ** 9))
+
+        def edit_and_total():
+            store.set(middle, 'qty', str(1 + next(edits) % 9))
+            make_totals(store)
+
+        results[f'core.update_totals[{size}]'] = time_case(edit_and_total, runs)
+        results[f'core.recompute[{size}]'] = time_case(store.recompute, runs)
+        results[f'core.add_row[{size}]'] = time_case(store.append, runs, setup=lambda: _trim(store, size))
+        results[f'core.remove_row[{size}]'] = time_case(store.pop, runs, setup=lambda: _grow(store, size))
+        results[f'core.invoice_data[{size}]'] = time_case(
+            lambda: make_invoice_data(store, "Dr. Benchmark", "01-10-2025", '5'), runs
+        )
+
+        items = distinct_items(size)
+        cold_store = LineItemStore()
+        cold_store.extend(items)
+
+        def load_cold():
+            loaded = LineItemStore()
+            loaded.extend(items)
+            make_invoice_data(loaded, "Dr. Benchmark", "01-10-2025", '5')
+
+        columns = cold_store.columns()
+        results[f'core.recompute_cold[{size}]'] = time_case(cold_store.recompute, runs, setup=clear_parse_cache)
+        results[f'core.recompute_float[{size}]'] = time_case(lambda: float_amounts(columns), runs)
+        results[f'core.load_cold[{size}]'] = time_case(load_cold, runs, setup=clear_parse_cache)
+    return results
+
+
+def _float_number(text):
+    try:
+        return float(text or 0)
+    except ValueError:
+        return None
+
+
+def float_amounts(columns):
+    """
+    The float calculation money used before it was exact, as the reference
+    for the *_cold cases: parses every numeric column and returns the item
+    values, their GST and the two sums.
+    """
+    parsed = {key: list(map(_float_number, columns[key])) for key in NUMERIC_KEYS}
+    numbers = {key: array('d', [0.0 if number is None else number for number in column])
+               for key, column in parsed.items()}
+    valid = array('d', [0.0 if None in row else 1.0 for row in zip(*(parsed[key] for key in CALC_KEYS))])
+    qty, rate, gst = (numbers[key] for key in CALC_KEYS)
+    values = array('d', map(mul, map(mul, qty, rate), valid))
+    gst_amounts = array('d', map(mul, values, map(truediv, gst, repeat(100.0))))
+    return values, gst_amounts, fsum(values), fsum(gst_amounts)
+
+
+def compare_to_float(results, threshold):
+    """
+    Returns [(case, float ms, exact ms, ratio)] for the exact cases slower
+    than the float reference allows. Compares the fastest runs, as the noise
+    of a busy machine only ever adds time.
+    """
+    slower = []
+    for case, reference in results.items():
+        if '_float[' not in case:
+            continue
+        exact_case = case.replace('_float[', '_cold[')
+        exact = results[exact_case]['min_ms']
+        if exact > reference['min_ms'] * (1 + threshold):
+            slower.append((exact_case, reference['min_ms'], exact, exact / reference['min_ms']))
+    return slower
+
+
+def make_totals(store):
+    """The core of update_totals: totals for the discount, formatted for the labels."""
+    return {name: format_amount(value) for name, value in store.totals('5').items()}
+
+
+def _trim(store, size):
+    while len(store) > size:
+        store.pop()
+
+
+def _grow(store, size):
+    while len(store) <= size:
+        store.append()
+
+
+def has_display():
+    try:
+        import tkinter
+        tkinter.Tk().destroy()
+        return True
+    except Exception:
+        return False
+
+
+def gui_cases(sizes, runs):
+    import handinvoice
+
+    results = {}
+    for size in sizes:
+        # A data folder of its own, or the app would find the previous app's
+        # autosave and stop at the Restore Invoice question
+        os.environ['SIMPLEINVOICE_HOME'] = tempfile.mkdtemp(prefix='simpleinvoice-bench-')
+        app = handinvoice.InvoiceApp()
+        app.withdraw()
+        app.items.clear()
+        app.items.extend(sample_items(size))
+        app.item_grid.refresh()
+        app.doctor_name_entry.insert(0, "Dr. Benchmark")
+        app.update()
+        edits = iter(range(10 ** 9))
+
+        def update_totals():
+            app.items.set(size // 2, 'qty', str(1 + next(edits) % 9))
+            app._rows_changed = True
+            app.update_totals()
+
+        def trim():
+            while len(app.items) > size:
+                app.items.pop()
+            app.item_grid.refresh()
+
+        def grow():
+            while len(app.items) <= size:
+                app.items.append()
+            app.item_grid.refresh()
+
+        results[f'gui.update_totals[{size}]'] = time_case(update_totals, runs)
+        results[f'gui.add_item_row[{size}]'] = time_case(
+            lambda: (app.add_item_row(), app.update_idletasks()), runs, setup=trim
+        )
+        results[f'gui.remove_last_item_row[{size}]'] = time_case(
+            lambda: (app.remove_last_item_row(), app.update_idletasks()), runs, setup=grow
+        )
+        results[f'gui.get_invoice_data[{size}]'] = time_case(app._get_invoice_data, runs)
+        app.journal.close()
+        app.destroy()
+    return results
+
+
+def pdf_cases(sizes, runs):
+    from invoice_pdf import build_invoice_pdf, default_template
+
+    default_template()  # Imports and fonts are covered by the startup cases
+    results = {}
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, 'invoice.pdf')
+        for size in sizes:
+            store = LineItemStore()
+            store.extend(sample_items(size))
+
+            def generate():
+                data = make_invoice_data(store, "Dr. Benchmark", "01-10-2025", '5')
+                assert validate_invoice(data) is None
+                build_invoice_pdf(data, path)
+
+            results[f'pdf.generate[{size}]'] = time_case(generate, max(3, runs // 5) if size > 100 else runs)
+    return results
+
+
+def startup_cases(runs):
+    return {
+        f'startup.{name}': {'median_ms': in_process, 'process_ms': process, 'runs': runs}
+        for name, (in_process, process) in bench_startup.measure(runs).items()
+    }
+
+
+def compare(results, baseline, threshold):
+    """Returns [(case, baseline ms, current ms, ratio)] for the cases that got slower than allowed."""
+    regressions = []
+    for case, current in results.items():
+        before = baseline.get(case)
+        if before is None:
+            continue
+        slower = current['median_ms'] - before['median_ms']
+        if slower > NOISE_FLOOR_MS and current['median_ms'] > before['median_ms'] * (1 + threshold):
+            regressions.append((case, before['median_ms'], current['median_ms'], current['median_ms'] / before['median_ms']))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Time the app's hot paths and compare against a baseline.")
+    parser.add_argument('--runs', type=int, default=25, help="runs per case (default: 25)")
+    parser.add_argument('--quick', action='store_true', help="fewer runs and no 10k-item cases")
+    parser.add_argument('--output', help="write the results as JSON to this file")
+    parser.add_argument('--baseline', help=f"compare against a results file (e.g. {os.path.relpath(DEFAULT_BASELINE)})")
+    parser.add_argument('--save-baseline', action='store_true', help="also write the results as the stored baseline")
+    parser.add_argument('--threshold', type=float, default=0.25,
+                        help="allowed slowdown against the baseline as a fraction (default: 0.25)")
+    args = parser.parse_args(argv)
+
+    runs = 5 if args.quick else args.runs
+    sizes = SIZES[:-1] if args.quick else SIZES
+    display = has_display()
+
+    results = core_cases(sizes, runs)
+    if display:
+        results.update(gui_cases(sizes, runs))
+    results.update(pdf_cases(PDF_SIZES, runs))
+    results.update(startup_cases(max(3, runs // 5)))
+
+    report = {
+        'meta': {
+            'date': datetime.now().isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'display': display,
+            'runs': runs,
+        },
+        'results': results,
+    }
+
+    print(f"{'case':<36}{'median (ms)':>14}{'min (ms)':>12}")
+    for case, stats in results.items():
+        print(f"{case:<36}{stats['median_ms']:>14.3f}{stats.get('min_ms', stats['median_ms']):>12.3f}")
+    if not display:
+        print("\nGUI coverage missing: no display, so the gui.* cases did not run and are not in\n"
+              "these results. Run the suite under xvfb-run to cover them.")
+
+    status = 0
+    slower = compare_to_float(results, args.threshold)
+    if slower:
+        print(f"\n{len(slower)} exact case(s) slower than the float reference:")
+        for case, reference, current, ratio in slower:
+            print(f"  {case:<34}{reference:>10.3f} -> {current:.3f} ms ({ratio:.2f}x)")
+        status = 1
+
+    for path in filter(None, [args.output, DEFAULT_BASELINE if args.save_baseline else None]):
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+        print(f"Results written to {path}")
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        if display and not any(case.startswith('gui.') for case in baseline):
+            print(f"\nGUI coverage missing: {args.baseline} has no gui.* cases to compare against.")
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for case, before, current, ratio in regressions:
+                print(f"  {case:<34}{before:>10.3f} -> {current:.3f} ms ({ratio:.2f}x)")
+            return 1
+        print(f"\nNo regressions against {args.baseline} (threshold {args.threshold:.0%}).")
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
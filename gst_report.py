@@ -0,0 +1,86 @@
+"""
+GST and sales summaries from the invoice database, for monthly filing.
+
+    python gst_report.py --year 2025 --by month,gst_rate -o gst_2025.csv
+
+The figures come from rollups the invoice store keeps per day, doctor and
+GST rate as each invoice is saved, so a year's summary takes milliseconds
+however many invoices there are.
+"""
+import argparse
+import csv
+import sys
+
+from invoice_core import format_amount
+from invoice_store import ROLLUP_AMOUNTS, ROLLUP_GROUPS, InvoiceStore
+
+COLUMN_TITLES = {
+    'year': "Year", 'month': "Month", 'day': "Date", 'doctor': "Doctor's Name", 'gst_rate': "GST (%)",
+    'gross_amount': "Gross Amount", 'discount_amount': "Discount", 'taxable_amount': "Taxable Amount",
+    'gst_amount': "GST Amount",
+}
+
+
+def year_range(year):
+    """Returns the ('dd-mm-yyyy', 'dd-mm-yyyy') first and last dates of a year."""
+    return f"01-01-{year}", f"31-12-{year}"
+
+
+def report_rows(store, group_by, date_from=None, date_to=None, doctor=None):
+    """Returns the summary as rows of display texts, with a Total row at the end if grouped."""
+    summary = store.rollups(group_by, date_from, date_to, doctor)
+    rows = []
+    for entry in summary:
+        row = [f"{entry[group]:g}" if group == 'gst_rate' else (entry[group] or "(no date)") for group in group_by]
+        rows.append(row + [format_amount(entry[name]) for name in ROLLUP_AMOUNTS])
+    if summary and group_by:
+        totals = [format_amount(sum(entry[name] for entry in summary)) for name in ROLLUP_AMOUNTS]
+        rows.append(["Total"] + [""] * (len(group_by) - 1) + totals)
+    return rows
+
+
+def write_csv(path, group_by, rows):
+    """Writes report rows to a CSV file with a header row."""
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow([COLUMN_TITLES[key] for key in list(group_by) + list(ROLLUP_AMOUNTS)])
+        writer.writerows(rows)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize taxable amount, discount and GST from saved invoices.")
+    parser.add_argument('--year', type=int, help="only this year")
+    parser.add_argument('--from', dest='date_from', help="first date, dd-mm-yyyy")
+    parser.add_argument('--to', dest='date_to', help="last date, dd-mm-yyyy")
+    parser.add_argument('--doctor', help="only this doctor")
+    parser.add_argument('--by', default='month,gst_rate',
+                        help=f"comma-separated grouping from {', '.join(ROLLUP_GROUPS)} (default: month,gst_rate)")
+    parser.add_argument('-o', '--output', help="write CSV to this file instead of printing")
+    parser.add_argument('--db', help="invoice database (default: the app's)")
+    args = parser.parse_args(argv)
+
+    group_by = tuple(group for group in args.by.split(',') if group)
+    unknown = [group for group in group_by if group not in ROLLUP_GROUPS]
+    if unknown:
+        parser.error(f"unknown grouping: {', '.join(unknown)}")
+    date_from, date_to = year_range(args.year) if args.year else (None, None)
+    date_from, date_to = args.date_from or date_from, args.date_to or date_to
+
+    store = InvoiceStore(args.db)
+    try:
+        rows = report_rows(store, group_by, date_from, date_to, args.doctor)
+    finally:
+        store.close()
+
+    if args.output:
+        write_csv(args.output, group_by, rows)
+        print(f"Wrote {len(rows)} rows to {args.output}")
+    else:
+        writer = csv.writer(sys.stdout)
+        writer.writerow([COLUMN_TITLES[key] for key in list(group_by) + list(ROLLUP_AMOUNTS)])
+        writer.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,30 +1,630 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 from datetime import date, datetime
+import argparse
+import csv
+import functools
+import importlib
+import importlib.util
 import os
+import queue
+import sqlite3
 import sys
+import threading
+import time
 
-# --- Environment Diagnosis ---
-print("--- Python Environment ---")
-print(f"Executable: {sys.executable}")
-print(f"Version: {sys.version}")
-print("--------------------------")
-
-# Attempt to import required libraries.
-try:
-    from reportlab.lib.pagesizes import letter
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    from reportlab.lib import colors
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.lib.units import inch
-    from tkcalendar import Calendar
-except ImportError as e:
-    missing_library = str(e).split("'")[1]
+from invoice_core import (
+    ITEM_KEYS, LineItemStore, format_amount, make_invoice_data, validate_invoice,
+    invoice_filename, sanitize_filename, item_values, parse_item_table, table_rows,
+)
+import gst_report
+import instrumentation
+from instrumentation import profiled, timed
+from invoice_journal import AutosaveJournal
+from invoice_numbers import InvoiceNumbers, format_invoice_number
+from invoice_store import InvoiceStore
+from invoice_workspace import Workspace
+from pdf_cache import PdfCache, invoice_key
+from print_queue import PrintQueue, DONE, FAILED
+from product_catalog import ProductCatalog
+
+# Third-party libraries. They are only checked for at startup and imported
+# on first use (or pre-warmed in the background), to keep launching fast.
+REQUIRED_LIBRARIES = ('reportlab', 'tkcalendar')
+# Modules pre-warmed on a background thread once the window is up.
+LAZY_MODULES = ('invoice_pdf', 'tkcalendar')
+PREWARM_DELAY_MS = 250
+# Longest doctor's name shown on a workspace tab.
+TAB_TITLE_LENGTH = 24
+# How often the diagnostics status bar is updated.
+STATUS_REFRESH_MS = 1000
+# Rejected rows listed in the import report before it is cut short.
+IMPORT_ERRORS_SHOWN = 15
+# How often the product catalog file is checked for changes.
+CATALOG_REFRESH_MS = 3000
+# How often a running catalog load is checked for completion.
+CATALOG_POLL_MS = 100
+
+
+def print_environment():
+    """Prints the Python environment, to help diagnose installation problems."""
+    print("--- Python Environment ---")
+    print(f"Executable: {sys.executable}")
+    print(f"Version: {sys.version}")
+    print("--------------------------")
+
+
+def show_missing_library(missing_library):
+    """Tells the user how to install a missing library."""
     messagebox.showerror(
         "Missing Library",
         f"The '{missing_library}' library is required. Please install it by running:\n\npip install {missing_library}"
     )
-    sys.exit(1)
+
+
+def check_required_libraries():
+    """Exits with an error if a required library is not installed, without importing it."""
+    for missing_library in REQUIRED_LIBRARIES:
+        if importlib.util.find_spec(missing_library) is None:
+            show_missing_library(missing_library)
+            sys.exit(1)
+
+
+def import_library(module_name):
+    """
+    Imports a module that depends on a third-party library, showing the
+    Missing Library error and returning None if it cannot be imported.
+    """
+    try:
+        return importlib.import_module(module_name)
+    except ImportError as e:
+        show_missing_library((e.name or module_name).split('.')[0])
+        return None
+
+
+def _prewarm_imports():
+    """Imports the lazily loaded modules; runs on a background thread."""
+    for module_name in LAZY_MODULES:
+        try:
+            importlib.import_module(module_name)
+        except ImportError:
+            pass  # Reported when the feature is first used
+
+class VirtualItemGrid(ttk.Frame):
+    """
+    An item grid that keeps line items in a LineItemStore and only realizes
+    widgets for the rows in the visible viewport. A fixed pool of row widgets
+    is recycled as the grid scrolls, so thousands of items cost no more Tk
+    widgets than a screenful.
+
+    `on_edit` is called as on_edit(index, key, changed) after the user edits
+    a cell, where `changed` tells whether the row's computed values changed.
+    `autocomplete`, if given, handles Up/Down/Return/Escape in product cells
+    while its suggestions are visible.
+    """
+    HEADERS = [
+        "S.No.", "Product Name", "Packing", "Batch No.", "Qty", "Free",
+        "Rate", "GST (%)", "Value (Excl. GST)", "Value (Incl. GST)"
+    ]
+    COLUMN_WIDTHS = [5, 35, 15, 15, 8, 8, 10, 8, 15, 15]
+    READONLY_KEYS = ('serial', 'val_excl_gst', 'val_incl_gst')
+    WHEEL_TAG = "VirtualItemGridWheel"
+
+    def __init__(self, master, items, on_edit, autocomplete=None):
+        super().__init__(master)
+        self.items = items
+        self.on_edit = on_edit
+        self.autocomplete = autocomplete
+        self.first = 0
+        self.visible = 1
+        self.slots = []
+        self._filling = False
+
+        self.body = ttk.Frame(self)
+        self.scrollbar = ttk.Scrollbar(self, orient="vertical", command=self._on_scrollbar)
+        self.body.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        self._create_item_headers()
+        self._add_slot()
+        self.row_height = self.slots[0]['widgets']['product'].winfo_reqheight() + 2
+
+        self.body.bind("<Configure>", self._on_resize)
+        self.bind_class(self.WHEEL_TAG, "<MouseWheel>", self._on_mousewheel)
+        self.bind_class(self.WHEEL_TAG, "<Button-4>", lambda e: self.scroll_to(self.first - 3))
+        self.bind_class(self.WHEEL_TAG, "<Button-5>", lambda e: self.scroll_to(self.first + 3))
+        self.body.bindtags((self.WHEEL_TAG,) + self.body.bindtags())
+
+    def _create_item_headers(self):
+        """Creates the header labels for the item list."""
+        for i, header in enumerate(self.HEADERS):
+            label = ttk.Label(self.body, text=header, style="Header.TLabel", borderwidth=1, relief="solid", padding=5, anchor="center")
+            label.grid(row=0, column=i, sticky="nsew")
+            label.bindtags((self.WHEEL_TAG,) + label.bindtags())
+            self.body.grid_columnconfigure(i, weight=1, minsize=self.COLUMN_WIDTHS[i]*5)
+        self.header_height = label.winfo_reqheight()
+
+    def _add_slot(self):
+        """Creates one reusable row of entry widgets at the bottom of the pool."""
+        slot = {'vars': {}, 'widgets': {}, 'shown': {}}
+        grid_row = len(self.slots) + 1
+
+        for i, key in enumerate(ITEM_KEYS):
+            var = tk.StringVar()
+            if key in self.READONLY_KEYS:
+                justify = 'center' if key == 'serial' else 'right'
+                entry = ttk.Entry(self.body, textvariable=var, state='readonly', justify=justify)
+            else:
+                justify = 'right' if key in ('qty', 'free', 'rate', 'gst') else 'left'
+                entry = ttk.Entry(self.body, textvariable=var, justify=justify)
+                var.trace_add("write", lambda *args, slot=slot, key=key: self._on_slot_write(slot, key))
+            entry.grid(row=grid_row, column=i, sticky="nsew", padx=1, pady=1)
+            entry.bindtags((self.WHEEL_TAG,) + entry.bindtags())
+            entry.bind("<Down>", lambda e, slot=slot, key=key: self._move_focus(slot, key, 1))
+            entry.bind("<Up>", lambda e, slot=slot, key=key: self._move_focus(slot, key, -1))
+            if key == 'product' and self.autocomplete is not None:
+                entry.bind("<Return>", lambda e: self.autocomplete.accept())
+                entry.bind("<Escape>", lambda e: self.autocomplete.hide())
+                entry.bind("<FocusOut>", lambda e: self.after(150, self._hide_autocomplete))
+            slot['vars'][key] = var
+            slot['widgets'][key] = entry
+
+        slot['position'] = len(self.slots)
+        slot['mapped'] = True
+        self.slots.append(slot)
+
+    def _set_slot_mapped(self, slot, mapped):
+        """Shows or hides a pool row without destroying its widgets."""
+        if slot['mapped'] == mapped:
+            return
+        for widget in slot['widgets'].values():
+            if mapped:
+                widget.grid()
+            else:
+                widget.grid_remove()
+        slot['mapped'] = mapped
+
+    def _show(self, slot, key, value):
+        """Writes a value into a pool row only if it differs from what is shown."""
+        if slot['shown'].get(key) != value:
+            slot['shown'][key] = value
+            slot['vars'][key].set(value)
+
+    def _on_resize(self, event):
+        """Grows the widget pool to fill the viewport height."""
+        self.visible = max(1, (event.height - self.header_height) // self.row_height)
+        if len(self.slots) < self.visible:
+            with timed('widgets.create', rows=self.visible - len(self.slots)):
+                while len(self.slots) < self.visible:
+                    self._add_slot()
+        self.first = self._clamp(self.first)
+        self.refresh()
+
+    def _on_scrollbar(self, *args):
+        """Handles the scrollbar's 'moveto' and 'scroll' commands."""
+        if args[0] == 'moveto':
+            self.scroll_to(int(round(float(args[1]) * len(self.items))))
+        elif args[0] == 'scroll':
+            step = int(args[1])
+            if args[2] == 'pages':
+                step *= self.visible
+            self.scroll_to(self.first + step)
+
+    def _on_mousewheel(self, event):
+        """Scrolls three rows per wheel notch."""
+        self.scroll_to(self.first + (-3 if event.delta > 0 else 3))
+
+    def _move_focus(self, slot, key, step):
+        """Moves the focus to the same column in the previous/next item."""
+        if key == 'product' and self.autocomplete is not None and self.autocomplete.visible:
+            self.autocomplete.move(step)
+            return "break"
+        index = self.first + slot['position'] + step
+        if 0 <= index < len(self.items):
+            self.see(index)
+            self.slots[index - self.first]['widgets'][key].focus_set()
+        return "break"
+
+    def _hide_autocomplete(self):
+        """Hides the suggestions once the focus has left the product entries (and the popup)."""
+        focus = self.focus_get()
+        if focus is None or focus.winfo_toplevel() is not self.autocomplete.popup:
+            self.autocomplete.hide()
+
+    def entry_for(self, index, key):
+        """Returns the entry widget currently showing a cell, or None if the item is not visible."""
+        position = index - self.first
+        if 0 <= position < self.visible and index < len(self.items):
+            return self.slots[position]['widgets'][key]
+        return None
+
+    def _on_slot_write(self, slot, key):
+        """Copies a user edit from a pool row back into the model."""
+        if self._filling:
+            return
+        index = self.first + slot['position']
+        if index >= len(self.items):
+            return
+        value = slot['vars'][key].get()
+        slot['shown'][key] = value
+        changed = self.items.set(index, key, value)
+        self.on_edit(index, key, changed)
+
+    def _clamp(self, first):
+        return max(0, min(first, len(self.items) - self.visible))
+
+    def scroll_to(self, first):
+        """Makes the item at `first` the top visible row."""
+        first = self._clamp(first)
+        if first != self.first:
+            self.first = first
+            self.refresh()
+        else:
+            self._update_scrollbar()
+
+    def see(self, index):
+        """Scrolls the minimum amount needed to make an item visible."""
+        if index < self.first:
+            self.scroll_to(index)
+        elif index >= self.first + self.visible:
+            self.scroll_to(index - self.visible + 1)
+
+    def refresh(self):
+        """Rebinds every pool row to the items currently in the viewport."""
+        self._filling = True
+        try:
+            for slot in self.slots:
+                index = self.first + slot['position']
+                if slot['position'] >= self.visible or index >= len(self.items):
+                    self._set_slot_mapped(slot, False)
+                    continue
+                for key in ITEM_KEYS:
+                    self._show(slot, key, self.items.get(index, key))
+                self._set_slot_mapped(slot, True)
+        finally:
+            self._filling = False
+        self._update_scrollbar()
+
+    def refresh_computed(self):
+        """Refreshes only the computed value columns of the visible rows."""
+        for slot in self.slots[:self.visible]:
+            index = self.first + slot['position']
+            if index >= len(self.items):
+                break
+            self._show(slot, 'val_excl_gst', self.items.get(index, 'val_excl_gst'))
+            self._show(slot, 'val_incl_gst', self.items.get(index, 'val_incl_gst'))
+
+    def _update_scrollbar(self):
+        """Sizes the scrollbar thumb to the viewport's share of all items."""
+        total = len(self.items)
+        if total <= self.visible:
+            self.scrollbar.set(0, 1)
+        else:
+            self.scrollbar.set(self.first / total, (self.first + self.visible) / total)
+
+
+class ProductAutocomplete:
+    """
+    A suggestion popup under the product entry being edited, fed by the
+    product catalog. Choosing a suggestion fills in the item's packing,
+    batch, rate and GST.
+    """
+    MAX_SUGGESTIONS = 8
+
+    def __init__(self, app):
+        self.app = app
+        self.popup = None
+        self.listbox = None
+        self.index = None
+        self.matches = []
+
+    @property
+    def visible(self):
+        return self.popup is not None
+
+    def update(self, index, text):
+        """Shows the catalog matches for the text typed into an item's product entry."""
+        entry = self.app.item_grid.entry_for(index, 'product')
+        matches = self.app.catalog.suggest(text, self.MAX_SUGGESTIONS) if text else []
+        if entry is None or entry.focus_get() is not entry or not matches or (
+            len(matches) == 1 and matches[0]['product'] == text
+        ):
+            self.hide()
+            return
+
+        self.index = index
+        self.matches = matches
+        if self.popup is None:
+            self.popup = tk.Toplevel(self.app)
+            self.popup.wm_overrideredirect(True)
+            self.listbox = tk.Listbox(self.popup, height=self.MAX_SUGGESTIONS, exportselection=False)
+            self.listbox.pack(fill=tk.BOTH, expand=True)
+            self.listbox.bind("<ButtonRelease-1>", lambda e: self.accept())
+        self.listbox.delete(0, tk.END)
+        for match in matches:
+            self.listbox.insert(tk.END, f"{match['product']}   {match['packing']}   {match['rate']}")
+        self.listbox.config(height=len(matches))
+        self.listbox.selection_set(0)
+        self.popup.geometry(
+            f"{max(entry.winfo_width(), 300)}x{self.listbox.winfo_reqheight()}"
+            f"+{entry.winfo_rootx()}+{entry.winfo_rooty() + entry.winfo_height()}"
+        )
+
+    def move(self, step):
+        """Moves the highlighted suggestion up or down."""
+        current = self.listbox.curselection()
+        position = min(max((current[0] if current else -1) + step, 0), len(self.matches) - 1)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(position)
+        self.listbox.see(position)
+
+    def accept(self):
+        """Fills the item from the highlighted suggestion."""
+        if not self.visible:
+            return
+        current = self.listbox.curselection()
+        if current:
+            self.app.apply_product(self.index, self.matches[current[0]])
+        self.hide()
+
+    def hide(self):
+        if self.popup is not None:
+            self.popup.destroy()
+            self.popup = None
+            self.listbox = None
+
+
+class InvoiceSearchWindow(tk.Toplevel):
+    """
+    A window for finding saved invoices by doctor, product and date range and
+    reopening one in the main window. Searches run as the user types.
+    """
+    SEARCH_DELAY_MS = 150
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Find Invoices")
+        self.geometry("700x450")
+        self._search_after_id = None
+
+        filters = ttk.Frame(self, padding=10)
+        filters.pack(fill=tk.X)
+        self.filter_vars = {}
+        for column, (key, label, width) in enumerate([
+            ('doctor', "Doctor:", 20), ('product', "Product:", 20),
+            ('date_from', "From:", 11), ('date_to', "To:", 11),
+        ]):
+            ttk.Label(filters, text=label).grid(row=0, column=column * 2, sticky="e", padx=(5, 2))
+            var = tk.StringVar()
+            var.trace_add("write", lambda *args: self._schedule_search())
+            ttk.Entry(filters, textvariable=var, width=width).grid(row=0, column=column * 2 + 1, sticky="w")
+            self.filter_vars[key] = var
+
+        results_frame = ttk.Frame(self, padding=(10, 0))
+        results_frame.pack(fill=tk.BOTH, expand=True)
+        self.results = ttk.Treeview(
+            results_frame, columns=('date', 'doctor', 'items', 'total'), show='headings', selectmode='browse'
+        )
+        for column, heading, width, anchor in [
+            ('date', "Date", 90, 'center'), ('doctor', "Doctor's Name", 300, 'w'),
+            ('items', "Items", 60, 'e'), ('total', "Grand Total", 100, 'e'),
+        ]:
+            self.results.heading(column, text=heading)
+            self.results.column(column, width=width, anchor=anchor)
+        scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=self.results.yview)
+        self.results.configure(yscrollcommand=scrollbar.set)
+        self.results.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+        self.results.bind("<Double-1>", lambda e: self.open_selected())
+
+        buttons = ttk.Frame(self, padding=10)
+        buttons.pack(fill=tk.X)
+        self.status_label = ttk.Label(buttons, text="")
+        self.status_label.pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Open", command=self.open_selected).pack(side=tk.RIGHT, padx=5)
+
+        self.search()
+
+    def _schedule_search(self):
+        """Runs one search once the user pauses typing."""
+        if self._search_after_id is not None:
+            self.after_cancel(self._search_after_id)
+        self._search_after_id = self.after(self.SEARCH_DELAY_MS, self.search)
+
+    def search(self):
+        """Fills the results list from the invoice store."""
+        self._search_after_id = None
+        store = self.app.get_invoice_store()
+        if store is None:
+            return
+        filters = {key: var.get().strip() or None for key, var in self.filter_vars.items()}
+        start = time.perf_counter()
+        found = store.search(**filters)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        self.results.delete(*self.results.get_children())
+        for invoice in found:
+            self.results.insert('', 'end', iid=str(invoice['id']), values=(
+                invoice['date'], invoice['doctor_name'], invoice['item_count'], format_amount(invoice['grand_total'])
+            ))
+        self.status_label.config(text=f"{len(found)} invoices found in {elapsed_ms:.0f} ms")
+
+    def open_selected(self):
+        """Reloads the selected invoice into the main window."""
+        selection = self.results.selection()
+        if not selection:
+            return
+        record = self.app.get_invoice_store().load(int(selection[0]))
+        if record is not None and self.app.load_invoice(record, saved=True):
+            self.destroy()
+
+
+class GstReportWindow(tk.Toplevel):
+    """
+    Monthly (or daily, per-doctor, per-rate) GST summaries from the invoice
+    store's rollups, with export to CSV.
+    """
+    GROUPINGS = {
+        "Month and GST rate": ('month', 'gst_rate'),
+        "Month and doctor": ('month', 'doctor'),
+        "Day": ('day',),
+        "GST rate": ('gst_rate',),
+    }
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("GST Report")
+        self.geometry("800x450")
+        self.rows = []
+
+        filters = ttk.Frame(self, padding=10)
+        filters.pack(fill=tk.X)
+        ttk.Label(filters, text="Year:").pack(side=tk.LEFT, padx=(5, 2))
+        self.year_var = tk.StringVar(value=str(date.today().year))
+        ttk.Spinbox(filters, from_=2000, to=2100, textvariable=self.year_var, width=6,
+                    command=self.refresh).pack(side=tk.LEFT)
+        ttk.Label(filters, text="Group by:").pack(side=tk.LEFT, padx=(15, 2))
+        self.grouping_var = tk.StringVar(value=next(iter(self.GROUPINGS)))
+        grouping = ttk.Combobox(filters, textvariable=self.grouping_var, values=list(self.GROUPINGS),
+                                state='readonly', width=20)
+        grouping.pack(side=tk.LEFT)
+        grouping.bind("<<ComboboxSelected>>", lambda e: self.refresh())
+        ttk.Button(filters, text="Show", command=self.refresh).pack(side=tk.LEFT, padx=10)
+
+        results_frame = ttk.Frame(self, padding=(10, 0))
+        results_frame.pack(fill=tk.BOTH, expand=True)
+        self.results = ttk.Treeview(results_frame, show='headings', selectmode='none')
+        scrollbar = ttk.Scrollbar(results_frame, orient="vertical", command=self.results.yview)
+        self.results.configure(yscrollcommand=scrollbar.set)
+        self.results.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        buttons = ttk.Frame(self, padding=10)
+        buttons.pack(fill=tk.X)
+        self.status_label = ttk.Label(buttons, text="")
+        self.status_label.pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Export CSV...", command=self.export_csv).pack(side=tk.RIGHT, padx=5)
+
+        self.refresh()
+
+    def refresh(self):
+        """Fills the table with the summary for the chosen year and grouping."""
+        store = self.app.get_invoice_store()
+        if store is None:
+            return
+        group_by = self.GROUPINGS[self.grouping_var.get()]
+        date_from, date_to = gst_report.year_range(self.year_var.get().strip())
+        start = time.perf_counter()
+        self.rows = gst_report.report_rows(store, group_by, date_from, date_to)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+
+        columns = list(group_by) + list(gst_report.ROLLUP_AMOUNTS)
+        self.results.delete(*self.results.get_children())
+        self.results.configure(columns=columns)
+        for column in columns:
+            self.results.heading(column, text=gst_report.COLUMN_TITLES[column])
+            self.results.column(column, width=110, anchor='w' if column in group_by else 'e')
+        for row in self.rows:
+            self.results.insert('', 'end', values=row)
+        self.status_label.config(text=f"{max(len(self.rows) - 1, 0)} rows in {elapsed_ms:.0f} ms")
+
+    def export_csv(self):
+        """Saves the table shown as a CSV file."""
+        if not self.rows:
+            messagebox.showwarning("Warning", "There is nothing to export.", parent=self)
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Export GST Report", defaultextension=".csv",
+            initialfile=f"GST_Report_{self.year_var.get().strip()}.csv", filetypes=[("CSV files", "*.csv")],
+        )
+        if not path:
+            return
+        try:
+            gst_report.write_csv(path, self.GROUPINGS[self.grouping_var.get()], self.rows)
+        except OSError as e:
+            messagebox.showerror("Error", f"Could not save the report.\nError: {e}", parent=self)
+
+
+class PrintQueueWindow(tk.Toplevel):
+    """
+    A window for queueing many PDFs at once (e.g. every invoice generated
+    today) and following the status of each print job.
+    """
+    REFRESH_MS = 500
+
+    def __init__(self, app):
+        super().__init__(app)
+        self.app = app
+        self.title("Print Queue")
+        self.geometry("700x350")
+        self._refresh_after_id = None
+
+        jobs_frame = ttk.Frame(self, padding=(10, 10, 10, 0))
+        jobs_frame.pack(fill=tk.BOTH, expand=True)
+        self.jobs_view = ttk.Treeview(
+            jobs_frame, columns=('job', 'files', 'status', 'message'), show='headings', selectmode='browse'
+        )
+        for column, heading, width, anchor in [
+            ('job', "#", 40, 'e'), ('files', "Files", 260, 'w'),
+            ('status', "Status", 80, 'center'), ('message', "Message", 280, 'w'),
+        ]:
+            self.jobs_view.heading(column, text=heading)
+            self.jobs_view.column(column, width=width, anchor=anchor)
+        scrollbar = ttk.Scrollbar(jobs_frame, orient="vertical", command=self.jobs_view.yview)
+        self.jobs_view.configure(yscrollcommand=scrollbar.set)
+        self.jobs_view.pack(side="left", fill="both", expand=True)
+        scrollbar.pack(side="right", fill="y")
+
+        buttons = ttk.Frame(self, padding=10)
+        buttons.pack(fill=tk.X)
+        self.merge_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(buttons, text="Send as one job", variable=self.merge_var).pack(side=tk.LEFT)
+        ttk.Button(buttons, text="Add PDFs...", command=self.add_files).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(buttons, text="Print Session Invoices", command=self.add_session_invoices).pack(side=tk.RIGHT, padx=5)
+
+        self.refresh()
+
+    def add_files(self):
+        """Queues PDFs chosen by the user."""
+        paths = filedialog.askopenfilenames(
+            parent=self, title="Print PDFs", filetypes=[("PDF files", "*.pdf"), ("All files", "*.*")],
+            initialdir=os.path.dirname(self.app.last_pdf_path) if self.app.last_pdf_path else None,
+        )
+        if paths:
+            self.app.print_queue.submit(paths, merge=self.merge_var.get())
+            self.refresh()
+
+    def add_session_invoices(self):
+        """Queues every PDF generated since the app started."""
+        paths = [path for path in self.app.generated_pdfs if os.path.exists(path)]
+        if not paths:
+            messagebox.showwarning("Warning", "No invoices have been generated in this session.", parent=self)
+            return
+        self.app.print_queue.submit(paths, merge=self.merge_var.get())
+        self.refresh()
+
+    def refresh(self):
+        """Shows the current status of every job, repeating while the window is open."""
+        for job in self.app.print_queue.jobs:
+            iid = str(job['id'])
+            names = ", ".join(os.path.basename(path) for path in job['paths'])
+            values = (job['id'], names, job['status'], job['message'])
+            if self.jobs_view.exists(iid):
+                self.jobs_view.item(iid, values=values)
+            else:
+                self.jobs_view.insert('', 'end', iid=iid, values=values)
+        if self._refresh_after_id is not None:
+            self.after_cancel(self._refresh_after_id)
+        self._refresh_after_id = self.after(self.REFRESH_MS, self.refresh)
+
+    def destroy(self):
+        if self._refresh_after_id is not None:
+            self.after_cancel(self._refresh_after_id)
+            self._refresh_after_id = None
+        super().destroy()
+
 
 class InvoiceApp(tk.Tk):
     """
@@ -32,7 +632,7 @@ class InvoiceApp(tk.Tk):
     Version 2.0 includes global discount functionality, PDF alignment fixes,
     and timestamped PDF generation.
     """
-    def __init__(self):
+    def __init__(self, diagnostics=False, profile_pdf=False):
         super().__init__()
         self.title("Simple Invoice Generator")
         self.geometry("1200x750")
@@ -46,17 +646,76 @@ class InvoiceApp(tk.Tk):
         style.configure("TButton", font=("Helvetica", 10, "bold"), padding=5)
         style.configure("Header.TLabel", font=("Helvetica", 12, "bold"))
         
-        self.item_rows = []
+        self.items = LineItemStore()
+        # Open invoices; only the active one is loaded into the editor
+        self.workspace = Workspace()
+        self.active_tab_var = tk.IntVar(value=0)
         self.last_pdf_path = None
+        # Cache key of the invoice last_pdf_path was generated from
+        self._last_pdf_key = None
+        # Opened on first use by generate_pdf()
+        self.pdf_cache = None
+        # Invoice number allocators by output folder
+        self._invoice_numbers = {}
+        # Every PDF generated since the app started, for the print queue
+        self.generated_pdfs = []
+        self.print_queue = PrintQueue()
+        # Jobs sent with Print Invoice, reported when they finish
+        self._watched_print_jobs = []
+        # Result queue of the PDF currently rendering on a worker thread, if any
+        self._pdf_results = None
+        # Opened on first use by get_invoice_store()
+        self.invoice_store = None
+        self.catalog = ProductCatalog()
+        self.autocomplete = ProductAutocomplete(self)
+        # Started by _restore_autosave() once the window is up
+        self.journal = AutosaveJournal()
+        # Counts the edits of the invoice being edited, so a PDF that finishes
+        # rendering only marks it saved if nothing changed in the meantime
+        self._revision = 0
+        # The revision last saved as a PDF (or opened from the invoice store)
+        self._saved_revision = 0
         self.discount_percent_var = tk.StringVar(value='0')
+
+        # Totals display state: bursts of edits are coalesced into a single
+        # after_idle refresh of the labels.
+        self._totals_after_id = None
+        self._rows_changed = False
+        self._shown_totals = {}
+
+        # Diagnostics: a status bar with the latest timings, and cProfile around each PDF build
+        self.diagnostics = diagnostics
+        self.profile_pdf = profile_pdf
         
         self._create_widgets()
         self.add_item_row()
         
-        self.discount_percent_var.trace_add("write", lambda *args: self.update_totals())
+        self.discount_percent_var.trace_add("write", lambda *args: self._schedule_totals())
+        for key, var in (('doctor_name', self.doctor_name_var), ('date', self.date_var),
+                         ('discount_percent', self.discount_percent_var)):
+            var.trace_add("write", lambda *args, key=key, var=var: self._record_edit('header', key=key, value=var.get()))
+        self.doctor_name_var.trace_add("write", lambda *args: self._update_tab_title())
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+        self.after_idle(self._restore_autosave)
+
+        # Load reportlab/tkcalendar once the window has been drawn
+        self.after(PREWARM_DELAY_MS, lambda: threading.Thread(target=_prewarm_imports, daemon=True).start())
+        # Catalog loads can be large, so they run in the background
+        self._catalog_update = None
+        self.after(PREWARM_DELAY_MS, self._start_catalog_loader)
 
+    @timed('widgets.create')
     def _create_widgets(self):
         """Creates and places all the widgets in the main window."""
+        # --- Workspace Tabs (one button per open invoice) ---
+        tab_bar = ttk.Frame(self, padding=(10, 5, 10, 0))
+        tab_bar.pack(fill=tk.X)
+        ttk.Button(tab_bar, text="Close Invoice", command=self.close_tab).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(tab_bar, text="+ New Invoice", command=self.new_tab).pack(side=tk.RIGHT, padx=5)
+        self.tab_buttons_frame = ttk.Frame(tab_bar)
+        self.tab_buttons_frame.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        self.tab_buttons = []
+
         main_frame = ttk.Frame(self, padding="10")
         main_frame.pack(fill=tk.BOTH, expand=True)
         main_frame.rowconfigure(1, weight=1) 
@@ -76,31 +735,14 @@ class InvoiceApp(tk.Tk):
         ttk.Label(header_frame, text="Date:", font=("Helvetica", 11, "bold")).pack(side=tk.RIGHT, padx=(20, 5))
 
         ttk.Label(header_frame, text="Doctor's Name:", font=("Helvetica", 11, "bold")).pack(side=tk.LEFT, padx=5)
-        self.doctor_name_entry = ttk.Entry(header_frame, width=40)
+        self.doctor_name_var = tk.StringVar()
+        self.doctor_name_entry = ttk.Entry(header_frame, textvariable=self.doctor_name_var, width=40)
         self.doctor_name_entry.pack(side=tk.LEFT, padx=5, fill=tk.X, expand=True)
+        self._rebuild_tab_bar()
 
-        # --- Items Section ---
-        items_canvas_frame = ttk.Frame(main_frame)
-        items_canvas_frame.grid(row=1, column=0, sticky="nsew", pady=10)
-        
-        canvas = tk.Canvas(items_canvas_frame, bg="#ffffff")
-        scrollbar = ttk.Scrollbar(items_canvas_frame, orient="vertical", command=canvas.yview)
-        self.scrollable_frame = ttk.Frame(canvas)
-
-        self.scrollable_frame.bind(
-            "<Configure>",
-            lambda e: canvas.configure(
-                scrollregion=canvas.bbox("all")
-            )
-        )
-
-        canvas.create_window((0, 0), window=self.scrollable_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-        
-        self._create_item_headers()
+        # --- Items Section (virtualized: only visible rows have widgets) ---
+        self.item_grid = VirtualItemGrid(main_frame, self.items, self._on_item_edit, self.autocomplete)
+        self.item_grid.grid(row=1, column=0, sticky="nsew", pady=10)
 
         # --- Footer Section (Global Discount, Totals and Buttons) ---
         footer_frame = ttk.Frame(main_frame)
@@ -119,6 +761,12 @@ class InvoiceApp(tk.Tk):
 
         self.remove_item_btn = ttk.Button(button_frame, text="Remove Last Item", command=self.remove_last_item_row)
         self.remove_item_btn.pack(side=tk.LEFT, padx=5)
+
+        self.import_items_btn = ttk.Button(button_frame, text="Import Items...", command=self.import_items_from_file)
+        self.import_items_btn.pack(side=tk.LEFT, padx=5)
+
+        self.paste_items_btn = ttk.Button(button_frame, text="Paste Items", command=self.paste_items)
+        self.paste_items_btn.pack(side=tk.LEFT, padx=5)
         
         # 2. Global Discount Input (Bottom Left)
         discount_input_frame = ttk.Frame(left_footer_frame)
@@ -160,14 +808,38 @@ class InvoiceApp(tk.Tk):
         action_button_container = ttk.Frame(action_bar)
         action_button_container.pack(side=tk.RIGHT)
 
+        # Busy indicator, shown while a PDF renders in the background
+        self.pdf_status_label = ttk.Label(action_bar, text="")
+        self.pdf_status_label.pack(side=tk.LEFT, padx=5)
+        self.pdf_progress = ttk.Progressbar(action_bar, mode='indeterminate', length=150)
+
         self.generate_pdf_btn = ttk.Button(action_button_container, text="Generate PDF", command=self.generate_pdf)
         self.generate_pdf_btn.pack(side=tk.LEFT, padx=5)
 
         self.print_btn = ttk.Button(action_button_container, text="Print Invoice", command=self.print_invoice)
         self.print_btn.pack(side=tk.LEFT, padx=5)
 
+        self.print_queue_btn = ttk.Button(action_button_container, text="Print Queue", command=lambda: PrintQueueWindow(self))
+        self.print_queue_btn.pack(side=tk.LEFT, padx=5)
+
+        self.find_btn = ttk.Button(action_button_container, text="Find Invoices", command=lambda: InvoiceSearchWindow(self))
+        self.find_btn.pack(side=tk.LEFT, padx=5)
+
+        self.gst_report_btn = ttk.Button(action_button_container, text="GST Report", command=lambda: GstReportWindow(self))
+        self.gst_report_btn.pack(side=tk.LEFT, padx=5)
+
+        # --- Diagnostics Status Bar (optional) ---
+        if self.diagnostics:
+            self.status_bar = ttk.Label(self, text="", relief=tk.SUNKEN, anchor='w', padding=(5, 2))
+            self.status_bar.pack(side=tk.BOTTOM, fill=tk.X, before=main_frame)
+            self.after(STATUS_REFRESH_MS, self._refresh_status_bar)
+
     def _open_calendar(self):
         """Creates a Toplevel window with a calendar to select a date."""
+        tkcalendar = import_library('tkcalendar')
+        if tkcalendar is None:
+            return
+        Calendar = tkcalendar.Calendar
         
         def set_date():
             """Updates the date entry with the selected date and closes the calendar."""
@@ -205,338 +877,603 @@ class InvoiceApp(tk.Tk):
         top.geometry(f"+{popup_x}+{popup_y}")
 
 
-    def _create_item_headers(self):
-        """Creates the header labels for the item list."""
-        headers = [
-            "S.No.", "Product Name", "Packing", "Batch No.", "Qty", "Free",
-            "Rate", "GST (%)", "Value (Excl. GST)", "Value (Incl. GST)"
-        ]
-        column_widths = [5, 35, 15, 15, 8, 8, 10, 8, 15, 15]
-        
-        for widget in self.scrollable_frame.winfo_children():
-            if widget.grid_info().get('row') == 0:
-                widget.destroy()
-
-        for i, header in enumerate(headers):
-            label = ttk.Label(self.scrollable_frame, text=header, style="Header.TLabel", borderwidth=1, relief="solid", padding=5, anchor="center")
-            label.grid(row=0, column=i, sticky="nsew")
-            self.scrollable_frame.grid_columnconfigure(i, weight=1, minsize=column_widths[i]*5) 
-
     def add_item_row(self):
-        """Adds a new row of entry fields for an invoice item."""
-        row_num = len(self.item_rows) + 1
-        
-        row_vars = {
-            'serial': tk.StringVar(value=str(row_num)),
-            'product': tk.StringVar(),
-            'packing': tk.StringVar(),
-            'batch_no': tk.StringVar(),
-            'qty': tk.StringVar(value='0'),
-            'free': tk.StringVar(value='0'),
-            'rate': tk.StringVar(value='0.00'),
-            'gst': tk.StringVar(value='0'),
-            'val_excl_gst': tk.StringVar(value='0.00'),
-            'val_incl_gst': tk.StringVar(value='0.00')
-        }
-        
-        entry_widgets = {
-            'serial': ttk.Entry(self.scrollable_frame, textvariable=row_vars['serial'], state='readonly', justify='center'),
-            'product': ttk.Entry(self.scrollable_frame, textvariable=row_vars['product']),
-            'packing': ttk.Entry(self.scrollable_frame, textvariable=row_vars['packing']),
-            'batch_no': ttk.Entry(self.scrollable_frame, textvariable=row_vars['batch_no']),
-            'qty': ttk.Entry(self.scrollable_frame, textvariable=row_vars['qty'], justify='right'),
-            'free': ttk.Entry(self.scrollable_frame, textvariable=row_vars['free'], justify='right'),
-            'rate': ttk.Entry(self.scrollable_frame, textvariable=row_vars['rate'], justify='right'),
-            'gst': ttk.Entry(self.scrollable_frame, textvariable=row_vars['gst'], justify='right'),
-            'val_excl_gst': ttk.Entry(self.scrollable_frame, textvariable=row_vars['val_excl_gst'], state='readonly', justify='right'),
-            'val_incl_gst': ttk.Entry(self.scrollable_frame, textvariable=row_vars['val_incl_gst'], state='readonly', justify='right')
-        }
-        
-        item_keys_order = ['serial', 'product', 'packing', 'batch_no', 'qty', 'free', 'rate', 'gst', 'val_excl_gst', 'val_incl_gst']
-        
-        for i, key in enumerate(item_keys_order):
-            if key in entry_widgets:
-                entry_widgets[key].grid(row=row_num, column=i, sticky="nsew", padx=1, pady=1)
-
-        for key in ['qty', 'rate', 'gst']:
-            row_vars[key].trace_add("write", lambda *args: self.update_totals())
-            
-        self.item_rows.append({'vars': row_vars, 'widgets': entry_widgets})
-        self.update_totals()
+        """Adds a new invoice item and scrolls it into view."""
+        self.items.append()
+        self._record_edit('append', items=[{}])
+        self.item_grid.refresh()
+        self.item_grid.see(len(self.items) - 1)
+        self._schedule_totals()
 
     def remove_last_item_row(self):
         """Removes the last item row from the invoice."""
-        if len(self.item_rows) > 1:
-            last_row = self.item_rows.pop()
-            for widget in last_row['widgets'].values():
-                widget.destroy()
+        if len(self.items) > 1:
+            self.items.pop()
+            self._record_edit('pop')
+            self.item_grid.refresh()
+            self.item_grid.scroll_to(self.item_grid.first)
             self.update_totals()
         else:
             messagebox.showwarning("Warning", "Cannot remove the last item row.")
-            
-    def update_totals(self):
+
+    def import_items_from_file(self):
+        """Imports line items from a CSV (or tab-separated) file chosen by the user."""
+        path = filedialog.askopenfilename(
+            title="Import Items",
+            filetypes=[("CSV files", "*.csv"), ("Text files", "*.txt *.tsv"), ("All files", "*.*")],
+        )
+        if not path:
+            return
+        try:
+            with open(path, newline='', encoding='utf-8-sig') as f:
+                text = f.read()
+        except (OSError, UnicodeDecodeError) as e:
+            messagebox.showerror("Error", f"Could not read the file.\nError: {e}")
+            return
+        self.import_items(text, os.path.basename(path))
+
+    def paste_items(self):
+        """Imports line items from rows copied out of a spreadsheet (or CSV text) on the clipboard."""
+        try:
+            text = self.clipboard_get()
+        except tk.TclError:
+            messagebox.showwarning("Warning", "The clipboard is empty.")
+            return
+        self.import_items(text, "the clipboard")
+
+    def import_items(self, text, source):
         """
-        Calculates item values and applies a Global Discount before calculating final totals.
+        Validates every row of an item table up front, then adds the valid
+        rows in one batch: a single store extend, one grid refresh (which
+        writes the cells with the traces suspended) and one totals pass.
+        Rejected rows are listed with their line numbers.
         """
-        # --- 1. Calculate Subtotal (Pre-Discount) ---
-        subtotal_pre_discount = 0.0
-        total_gst_amount_sum = 0.0
-        
-        for row in self.item_rows:
-            try:
-                qty = float(row['vars']['qty'].get() or 0)
-                rate = float(row['vars']['rate'].get() or 0)
-                gst_percent = float(row['vars']['gst'].get() or 0)
-
-                # Base Value (Excl. GST & Discount)
-                item_val_excl_gst = qty * rate
-                
-                # Item GST calculation 
-                item_gst_amount = item_val_excl_gst * (gst_percent / 100)
-                
-                item_val_incl_gst = item_val_excl_gst + item_gst_amount
-
-                # Update row variables (which updates the UI)
-                row['vars']['val_excl_gst'].set(f"{item_val_excl_gst:.2f}")
-                row['vars']['val_incl_gst'].set(f"{item_val_incl_gst:.2f}")
-
-                # Accumulate for Subtotal
-                subtotal_pre_discount += item_val_excl_gst
-                total_gst_amount_sum += item_gst_amount
-                
-            except (ValueError, tk.TclError):
-                row['vars']['val_excl_gst'].set("0.00")
-                row['vars']['val_incl_gst'].set("0.00")
-
-        # --- 2. Apply Global Discount ---
         try:
-            discount_percent = float(self.discount_percent_var.get() or 0)
-            if discount_percent < 0: discount_percent = 0
-        except ValueError:
-            discount_percent = 0.0
-            
-        # Calculate Discount Amount
-        discount_amount = subtotal_pre_discount * (discount_percent / 100)
-        
-        # Calculate Taxable Amount (Subtotal after Discount)
-        taxable_amount = subtotal_pre_discount - discount_amount
-        
-        # Recalculate GST based on the taxable amount using the effective average rate
-        if subtotal_pre_discount > 0:
-            effective_gst_rate = total_gst_amount_sum / subtotal_pre_discount
-        else:
-            effective_gst_rate = 0
-            
-        final_gst_amount = taxable_amount * effective_gst_rate
-        
-        # --- 3. Calculate Final Totals ---
-        grand_total_incl_gst = taxable_amount + final_gst_amount
-        
-        # --- 4. Update UI Labels ---
-        self.subtotal_label.config(text=f"{subtotal_pre_discount:.2f}")
-        self.total_discount_label.config(text=f"{discount_amount:.2f}")
-        self.total_excl_gst_label.config(text=f"{taxable_amount:.2f}")
-        self.total_gst_label.config(text=f"{final_gst_amount:.2f}")
-        self.grand_total_label.config(text=f"{grand_total_incl_gst:.2f}")
-        
-    def _get_invoice_data(self):
-        """Gathers all data from the UI fields and returns it in a structured dict."""
-        invoice_data = {
-            'doctor_name': self.doctor_name_entry.get(),
-            'date': self.date_var.get(), 
-            'items': [],
-            'discount_percent': self.discount_percent_var.get() or '0', 
-            'subtotal': self.subtotal_label.cget("text"),
-            'total_discount': self.total_discount_label.cget("text"),
-            'taxable_amount': self.total_excl_gst_label.cget("text"), 
-            'total_gst': self.total_gst_label.cget("text"),
-            'grand_total': self.grand_total_label.cget("text")
-        }
+            items, errors = parse_item_table(table_rows(text))
+        except csv.Error as e:
+            messagebox.showerror("Error", f"Could not read the items from {source}.\nError: {e}")
+            return
 
-        item_keys_for_pdf = ['serial', 'product', 'packing', 'batch_no', 'qty', 'free', 'rate', 'gst', 'val_excl_gst', 'val_incl_gst']
+        if items:
+            # Imported items replace the blank rows at the end, such as the starting row
+            blank_rows = 0
+            while len(self.items) and self.items.is_blank(len(self.items) - 1):
+                self.items.pop()
+                blank_rows += 1
+            if blank_rows:
+                self._record_edit('pop', count=blank_rows)
+            self.items.extend(items)
+            self._record_edit('append', items=items)
+            self.item_grid.refresh()
+            self.item_grid.see(len(self.items) - 1)
+            self._rows_changed = True
+            self.update_totals()
 
-        for row in self.item_rows:
-            item_values = [row['vars'][key].get() for key in item_keys_for_pdf]
-            
-            if row['vars']['product'].get():
-                invoice_data['items'].append(item_values)
+        if errors:
+            lines = [f"Line {line_number}: {message}" for line_number, message in errors[:IMPORT_ERRORS_SHOWN]]
+            if len(errors) > IMPORT_ERRORS_SHOWN:
+                lines.append(f"...and {len(errors) - IMPORT_ERRORS_SHOWN} more.")
+            messagebox.showwarning(
+                "Import Items",
+                f"Imported {len(items)} item(s) from {source}; skipped {len(errors)} row(s):\n\n" + "\n".join(lines),
+            )
+        elif not items:
+            messagebox.showwarning("Warning", f"No items found in {source}.")
+
+    def _on_item_edit(self, index, key, changed):
+        """Called by the item grid after the user edits a cell."""
+        self._record_edit('set', index=index, key=key, value=self.items.get(index, key))
+        if changed:
+            self._schedule_totals(rows_changed=True)
+        if key == 'product':
+            self.autocomplete.update(index, self.items.get(index, 'product'))
+
+    def apply_product(self, index, product):
+        """Fills an item's product, packing, batch, rate and GST from a catalog record."""
+        changed = False
+        for key in ('product', 'packing', 'batch_no', 'rate', 'gst'):
+            if product.get(key):
+                changed = self.items.set(index, key, product[key]) or changed
+                self._record_edit('set', index=index, key=key, value=product[key])
+        self.item_grid.refresh()
+        if changed:
+            self._schedule_totals(rows_changed=True)
+
+    def _start_catalog_loader(self):
+        """Reads changes to the product catalog file on a background thread."""
+        self._catalog_loader = threading.Thread(target=self._read_catalog_changes, daemon=True)
+        self._catalog_loader.start()
+        self.after(CATALOG_POLL_MS, self._poll_catalog)
+
+    def _read_catalog_changes(self):
+        """Runs on the loader thread; errors leave the current catalog in place."""
+        try:
+            self._catalog_update = self.catalog.read_changes()
+        except (OSError, ValueError, csv.Error) as e:
+            print(f"Could not load the product catalog: {e}", file=sys.stderr)
+
+    def _poll_catalog(self):
+        """
+        Installs the catalog changes the loader read (a reference swap, or a
+        few rows appended to the file), then schedules the next check.
+        """
+        if self._catalog_loader.is_alive():
+            self.after(CATALOG_POLL_MS, self._poll_catalog)
+            return
+        update, self._catalog_update = self._catalog_update, None
+        if update is not None:
+            self.catalog.apply(update)
+        self.after(CATALOG_REFRESH_MS, self._start_catalog_loader)
+
+    def _schedule_totals(self, rows_changed=False):
+        """
+        Schedules a single idle-time refresh of the totals, so a burst of
+        trace callbacks costs one pass.
+        """
+        self._rows_changed = self._rows_changed or rows_changed
+        if self._totals_after_id is None:
+            self._totals_after_id = self.after_idle(self.update_totals)
+
+    @timed('totals.update')
+    def update_totals(self):
+        """
+        Applies the Global Discount to the item store's running sums and
+        refreshes only the widgets whose values changed.
+        """
+        if self._totals_after_id is not None:
+            self.after_cancel(self._totals_after_id)
+            self._totals_after_id = None
+
+        # --- 1. Item values: only the visible rows have widgets to update ---
+        if self._rows_changed:
+            self._rows_changed = False
+            self.item_grid.refresh_computed()
+
+        # --- 2. Apply Global Discount and calculate Final Totals ---
+        totals = self.items.totals(self.discount_percent_var.get())
+
+        # --- 3. Update only the UI Labels whose text changed ---
+        labels = {
+            'subtotal': self.subtotal_label,
+            'total_discount': self.total_discount_label,
+            'taxable_amount': self.total_excl_gst_label,
+            'total_gst': self.total_gst_label,
+            'grand_total': self.grand_total_label,
+        }
+        for name, label in labels.items():
+            text = format_amount(totals[name])
+            if self._shown_totals.get(name) != text:
+                label.config(text=text)
+                self._shown_totals[name] = text
         
-        return invoice_data
+    @timed('invoice.data')
+    def _get_invoice_data(self):
+        """Gathers all data from the UI fields and the item store and returns it in a structured dict."""
+        return make_invoice_data(
+            self.items,
+            self.doctor_name_entry.get(),
+            self.date_var.get(),
+            self.discount_percent_var.get(),
+        )
         
     def generate_pdf(self):
-        """Generates a PDF file from the current invoice data, including a timestamp."""
+        """
+        Generates a PDF file from the current invoice data, including a timestamp.
+        The PDF is laid out and written on a worker thread so the window stays
+        responsive; the result is picked up on the main thread by _poll_pdf_result.
+        """
+        if self._pdf_results is not None:
+            return
+        invoice_pdf = import_library('invoice_pdf')
+        if invoice_pdf is None:
+            return
+
         data = self._get_invoice_data()
         
-        if not data['doctor_name']:
-            messagebox.showerror("Error", "Doctor's Name cannot be empty.")
-            return
-        if not data['items']:
-            messagebox.showerror("Error", "Cannot generate a PDF with no items.")
+        error = validate_invoice(data)
+        if error:
+            messagebox.showerror("Error", error)
             return
 
+        # --- Nothing to render if the invoice is unchanged since the last PDF ---
+        if (invoice_key(data) == self._last_pdf_key and self.last_pdf_path
+                and os.path.exists(self.last_pdf_path)):
+            if not messagebox.askyesno(
+                "PDF Up to Date",
+                f"This invoice has not changed since '{os.path.basename(self.last_pdf_path)}' was generated.\n\n"
+                "Save another copy?",
+            ):
+                return
+
         # --- Ask user for save location ---
         folder_path = filedialog.askdirectory(title="Select a folder to save the PDF")
         if not folder_path:
             return
             
-        # --- Generate a unique timestamp (HHMMSS) ---
-        current_time_str = datetime.now().strftime('%H%M%S')
-            
-        safe_doctor_name = self.sanitize_filename(data['doctor_name'])
-        
-        # --- FILENAME FORMAT: Invoice_Name_Date_Time.pdf ---
-        filename = f"Invoice_{safe_doctor_name}_{data['date']}_{current_time_str}.pdf"
+        # --- Next invoice number of the folder, unique across processes ---
+        invoice_number = self.allocate_invoice_number(folder_path)
+        if invoice_number is None:
+            return
+
+        # --- FILENAME FORMAT: Invoice_Name_Date_Number.pdf ---
+        filename = invoice_filename(data, format_invoice_number(invoice_number))
         
         full_path = os.path.join(folder_path, filename)
         
-        doc = SimpleDocTemplate(full_path, pagesize=letter)
-        elements = []
-        styles = getSampleStyleSheet()
+        if self.pdf_cache is None:
+            self.pdf_cache = PdfCache()
+        # A PDF rendered before from the same data is copied from the cache
+        build_pdf = functools.partial(self.pdf_cache.render, invoice_pdf.build_invoice_pdf)
 
-        # --- PDF Title and Header ---
-        elements.append(Paragraph("INVOICE", styles['h1']))
-        elements.append(Spacer(1, 0.2 * inch))
-        
-        header_data = [
-            [Paragraph(f"<b>Doctor's Name:</b> {data['doctor_name']}", styles['Normal']),
-             Paragraph(f"<b>Date:</b> {data['date']}", styles['Normal'])]
-        ]
-        
-        header_table = Table(header_data, colWidths=[4.5 * inch, 2.5 * inch])
-        header_table.setStyle(TableStyle([
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-            ('ALIGN', (1, 0), (1, 0), 'RIGHT') 
-        ]))
-        elements.append(header_table)
-        elements.append(Spacer(1, 0.3 * inch))
-
-        # --- PDF Items Table ---
-        table_data = [
-            ["S.No.", "Product Name", "Packing", "Batch No.", "Qty", "Free", "Rate", "GST(%)", "Value\n(Excl. GST)", "Value\n(Incl. GST)"]
-        ]
-        table_data.extend(data['items'])
-        
-        invoice_table = Table(table_data, colWidths=[0.4*inch, 2*inch, 0.8*inch, 0.8*inch, 0.4*inch, 0.4*inch, 0.5*inch, 0.6*inch, 0.8*inch, 0.8*inch])
-        
-        table_style = TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            
-            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-            
-            ('ALIGN', (4, 1), (-1, -1), 'RIGHT'), 
-            ('PADDING', (4,1), (-1, -1), 4)
-        ])
-        invoice_table.setStyle(table_style)
-        elements.append(invoice_table)
-        elements.append(Spacer(1, 0.3 * inch))
-
-        # --- PDF Totals Section with Conditional Discount Display ---
-        
-        # Row data collection
-        totals_data = []
-        
-        # 1. Subtotal (Row index 0)
-        totals_data.append(["Subtotal (Pre-Discount):", data['subtotal']])
-        
-        # 2. Discount Row (Conditional)
-        discount_amount = float(data['total_discount'])
-        discount_percent = float(data['discount_percent'])
-        
-        if discount_amount > 0:
-            discount_display = f"{discount_percent:.0f}%" if discount_percent > 0 else ""
-            totals_data.append([
-                Paragraph(f"<b>Discount ({discount_display}):</b>", styles['BodyText']), 
-                f"-{data['total_discount']}"
-            ])
-            # Row index for taxable amount shifts from 1 to 2
-            taxable_amount_row_index = 2
-            grand_total_row_index = 4
-        else:
-            # Row index for taxable amount remains 1
-            taxable_amount_row_index = 1
-            grand_total_row_index = 3
+        self._pdf_results = queue.Queue()
+        self._set_pdf_busy(True, f"Generating '{filename}'...")
+        threading.Thread(
+            target=self._build_pdf_worker,
+            args=(build_pdf, data, full_path, self._pdf_results, self.profile_pdf),
+            daemon=True,
+        ).start()
+        self.after(100, self._poll_pdf_result, full_path, data, self.workspace.tabs[self.workspace.active], self._revision)
 
-        # 3. Taxable Amount (Excl. GST)
-        totals_data.append(["Taxable Amount (Excl. GST):", data['taxable_amount']])
+    @staticmethod
+    def _build_pdf_worker(build_invoice_pdf, data, full_path, results, profile=False):
+        """Runs on a worker thread: builds the PDF and queues the outcome (None or the exception)."""
+        try:
+            with profiled('generate_pdf', enabled=profile):
+                build_invoice_pdf(data, full_path)
+            results.put(None)
+        except Exception as e:
+            results.put(e)
 
-        # 4. Total GST
-        totals_data.append(["Total GST:", data['total_gst']])
-        
-        # 5. Grand Total
-        totals_data.append([Paragraph("<b>Grand Total:</b>", styles['BodyText']), data['grand_total']])
+    def _poll_pdf_result(self, full_path, data, tab, revision):
+        """
+        Checks for the worker's result on the main thread, saves the invoice
+        and reports it. `tab` is the workspace tab the PDF was generated from
+        and `revision` the edit count of its invoice at the time.
+        """
+        try:
+            error = self._pdf_results.get_nowait()
+        except queue.Empty:
+            self.after(100, self._poll_pdf_result, full_path, data, tab, revision)
+            return
 
+        self._pdf_results = None
+        self._set_pdf_busy(False)
+        folder_path, filename = os.path.split(full_path)
+        if error is None:
+            if tab is self.workspace.tabs[self.workspace.active]:
+                self.last_pdf_path = full_path
+                self._last_pdf_key = invoice_key(data)
+                # Edits made while it rendered are not in the PDF, so they stay unsaved
+                if self._revision == revision:
+                    self._saved_revision = revision
+                    self.journal.mark_saved()
+            else:
+                # The user switched invoices while it rendered
+                tab['state'].update(last_pdf_path=full_path, last_pdf_key=invoice_key(data))
+                if tab['state'].get('revision') == revision:
+                    tab['state']['saved_revision'] = revision
+                self.journal.record_tabs(self._autosave_tabs())
+            self.generated_pdfs.append(full_path)
+            self.save_invoice(data, full_path)
+            messagebox.showinfo("Success", f"PDF '{filename}' generated successfully in\n{folder_path}")
+        elif isinstance(error, PermissionError):
+            messagebox.showerror("Error", f"Could not save PDF. Please close '{filename}' if it's open in another program and try again.")
+        else:
+            messagebox.showerror("Error", f"An unexpected error occurred:\n{error}")
 
-        # --- Totals Table Styling ---
-        totals_table = Table(totals_data, colWidths=[2.2*inch, 1*inch])
-        
-        # Define styles dynamically based on whether the discount row was included
-        table_style_list = [
-            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
-            ('ALIGN', (1, 0), (1, -1), 'RIGHT'), 
-            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'), 
-            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+    def allocate_invoice_number(self, folder_path):
+        """Returns the next invoice number for a folder, or None (after telling the user) if it cannot be reserved."""
+        numbers = self._invoice_numbers.get(folder_path)
+        if numbers is None:
+            numbers = self._invoice_numbers[folder_path] = InvoiceNumbers(folder_path)
+        try:
+            return numbers.allocate()
+        except (sqlite3.Error, OSError) as e:
+            messagebox.showerror("Error", f"Could not reserve an invoice number in\n{folder_path}\nError: {e}")
+            return None
+
+    def _set_pdf_busy(self, busy, message=""):
+        """Shows or hides the busy indicator and blocks/unblocks Generate PDF and Print."""
+        state = 'disabled' if busy else 'normal'
+        self.generate_pdf_btn.config(state=state)
+        self.print_btn.config(state=state)
+        self.pdf_status_label.config(text=message)
+        if busy:
+            self.pdf_progress.pack(side=tk.LEFT, padx=5)
+            self.pdf_progress.start(10)
+        else:
+            self.pdf_progress.stop()
+            self.pdf_progress.pack_forget()
+
+    def _refresh_status_bar(self):
+        """Shows the latest duration of each measured operation in the status bar."""
+        parts = [
+            f"{name} {values['last_ms']:.1f} ms (max {values['max_ms']:.1f})"
+            for name, values in sorted(instrumentation.stats().items())
         ]
+        self.status_bar.config(text="   ".join(parts))
+        self.after(STATUS_REFRESH_MS, self._refresh_status_bar)
+
+    def get_invoice_store(self):
+        """Returns the invoice database, opening it on first use (None if it cannot be opened)."""
+        if self.invoice_store is None:
+            try:
+                self.invoice_store = InvoiceStore()
+            except (OSError, sqlite3.Error) as e:
+                messagebox.showerror("Error", f"Could not open the invoice database:\n{e}")
+        return self.invoice_store
+
+    def save_invoice(self, data, pdf_path=None):
+        """Saves an invoice to the database; a failure is reported but does not undo the PDF."""
+        store = self.get_invoice_store()
+        if store is None:
+            return None
+        try:
+            return store.save(data, pdf_path)
+        except sqlite3.Error as e:
+            messagebox.showwarning("Warning", f"The PDF was created but the invoice could not be saved for searching:\n{e}")
+            return None
+
+    def load_invoice(self, record, saved=False):
+        """
+        Replaces the current invoice with a record (doctor_name, date,
+        discount_percent and items). Asks first if the current invoice has
+        any products. `saved` means the record is already in the invoice
+        store, so it does not count as unsaved changes. Returns True if the
+        invoice was loaded.
+        """
+        if any(self.items.text['product']) and not messagebox.askyesno(
+            "Open Invoice", "Replace the current invoice? Unsaved changes will be lost.", parent=self
+        ):
+            return False
+
+        self.doctor_name_entry.delete(0, tk.END)
+        self.doctor_name_entry.insert(0, record.get('doctor_name') or '')
+        self.date_var.set(record.get('date') or '')
+        self.discount_percent_var.set(record.get('discount_percent') or '0')
+
+        self.items.clear()
+        self.items.extend(item_values(item) for item in record.get('items') or [])
+        if not len(self.items):
+            self.items.append()
+        self.item_grid.first = 0
+        self.item_grid.refresh()
+        self._rows_changed = True
+        self.update_totals()
+        self._record_edit('load', invoice=self._autosave_record())
+        if saved:
+            self._saved_revision = self._revision
+            self.journal.mark_saved()
+        return True
 
-        if discount_amount > 0:
-            # If discount is included (Row index 1), make it bold
-            table_style_list.append(('FONTNAME', (0, 1), (1, 1), 'Helvetica-Bold'))
-            # Grand Total (last row) is always bold
-            table_style_list.append(('FONTNAME', (0, 4), (1, 4), 'Helvetica-Bold'))
+    # --- Workspace Tabs ---
+
+    def _tab_title(self, index):
+        """Returns the label of a tab: its doctor's name, shortened, or "New Invoice"."""
+        if index == self.workspace.active:
+            title = self.doctor_name_var.get().strip()
         else:
-            # If discount is NOT included, Grand Total is at Row index 3
-            table_style_list.append(('FONTNAME', (0, 3), (1, 3), 'Helvetica-Bold'))
+            title = self.workspace.tabs[index]['title']
+        if len(title) > TAB_TITLE_LENGTH:
+            title = title[:TAB_TITLE_LENGTH - 1] + "…"
+        return title or "New Invoice"
 
-        totals_table.setStyle(TableStyle(table_style_list))
+    def _rebuild_tab_bar(self):
+        """Recreates the tab buttons after a tab is opened or closed."""
+        for button in self.tab_buttons:
+            button.destroy()
+        self.tab_buttons = []
+        for index in range(len(self.workspace)):
+            button = ttk.Radiobutton(
+                self.tab_buttons_frame, text=self._tab_title(index), style="Toolbutton",
+                variable=self.active_tab_var, value=index, command=lambda index=index: self.switch_tab(index),
+            )
+            button.pack(side=tk.LEFT, padx=(0, 2))
+            self.tab_buttons.append(button)
+        self.active_tab_var.set(self.workspace.active)
 
+    def _update_tab_title(self):
+        """Keeps the active tab's label in step with the Doctor's Name field."""
+        if self.tab_buttons:
+            self.tab_buttons[self.workspace.active].config(text=self._tab_title(self.workspace.active))
 
-        wrapper_table = Table([[totals_table]], colWidths=[7.4*inch])
-        wrapper_table.setStyle(TableStyle([
-            ('ALIGN', (0,0), (0,0), 'RIGHT')
-        ]))
+    def _store_active_tab(self):
+        """Packs the invoice in the editor into its tab, with its scroll position and last PDF."""
+        tab = self.workspace.tabs[self.workspace.active]
+        tab['title'] = self.doctor_name_var.get().strip()
+        self.workspace.store(
+            self.workspace.active,
+            {
+                'doctor_name': self.doctor_name_var.get(),
+                'date': self.date_var.get(),
+                'discount_percent': self.discount_percent_var.get(),
+                'columns': self.items.columns(),
+            },
+            {'first': self.item_grid.first, 'last_pdf_path': self.last_pdf_path, 'last_pdf_key': self._last_pdf_key,
+             'revision': self._revision, 'saved_revision': self._saved_revision},
+        )
 
-        elements.append(wrapper_table)
-        
-        try:
-            doc.build(elements)
-            self.last_pdf_path = full_path
-            messagebox.showinfo("Success", f"PDF '{filename}' generated successfully in\n{folder_path}")
-        except PermissionError:
-            messagebox.showerror("Error", f"Could not save PDF. Please close '{filename}' if it's open in another program and try again.")
-        except Exception as e:
-            messagebox.showerror("Error", f"An unexpected error occurred:\n{e}")
+    def _show_active_tab(self):
+        """Loads the active tab's invoice (or a blank one) into the editor."""
+        invoice, state = self.workspace.take(self.workspace.active)
+        self.autocomplete.hide()
+        if invoice is None:
+            invoice = {'doctor_name': '', 'date': date.today().strftime('%d-%m-%Y'), 'discount_percent': '0'}
+            self.items.clear()
+            self.items.append()
+        else:
+            self.items.load_columns(invoice['columns'])
+        self.doctor_name_var.set(invoice['doctor_name'])
+        self.date_var.set(invoice['date'])
+        self.discount_percent_var.set(invoice['discount_percent'])
+        self.last_pdf_path = state.get('last_pdf_path')
+        self._last_pdf_key = state.get('last_pdf_key')
+
+        self.item_grid.first = self.item_grid._clamp(state.get('first', 0))
+        self.item_grid.refresh()
+        self._rows_changed = True
+        self.update_totals()
+        # Autosave follows the invoice being edited; the one left is now in the tabs file
+        self.journal.record_tabs(self._autosave_tabs())
+        self.journal.record('load', invoice=self._autosave_record())
+        # Loading the tab set the header fields; that is not an edit
+        self._revision = state.get('revision', 0)
+        self._saved_revision = state.get('saved_revision', 0)
+        if self._revision == self._saved_revision:
+            self.journal.mark_saved()
+
+    def switch_tab(self, index):
+        """Makes another open invoice the one being edited."""
+        if index == self.workspace.active:
+            return
+        with timed('tab.switch', items=len(self.items)):
+            self._store_active_tab()
+            self.workspace.active = index
+            self._show_active_tab()
+        self.active_tab_var.set(index)
+
+    def new_tab(self):
+        """Opens a blank invoice in a new tab."""
+        self._store_active_tab()
+        self.workspace.active = self.workspace.add()
+        self._show_active_tab()
+        self._rebuild_tab_bar()
+        self.doctor_name_entry.focus_set()
+
+    def close_tab(self):
+        """Closes the invoice being edited, asking first if it has any products."""
+        if len(self.workspace) == 1:
+            messagebox.showwarning("Warning", "Cannot close the last invoice.")
+            return
+        if any(self.items.text['product']) and not messagebox.askyesno(
+            "Close Invoice", "Close this invoice? Unsaved changes will be lost.", parent=self
+        ):
+            return
+        self.workspace.close_active()
+        self._show_active_tab()
+        self._rebuild_tab_bar()
+
+    # --- Autosave ---
+
+    def _record_edit(self, op, **fields):
+        """Counts an edit of the invoice being edited and queues it for the autosave journal."""
+        self._revision += 1
+        self.journal.record(op, **fields)
+
+    def _autosave_record(self):
+        """Returns the invoice being edited as a plain record, including blank rows."""
+        return {
+            'doctor_name': self.doctor_name_var.get(),
+            'date': self.date_var.get(),
+            'discount_percent': self.discount_percent_var.get(),
+            'items': [item_values(self.items.row(index)) for index in range(len(self.items))],
+        }
+
+    def _autosave_tabs(self):
+        """Returns the other open tabs holding an invoice, for AutosaveJournal.record_tabs()."""
+        return [
+            {'title': tab['title'], 'packed': tab['packed'],
+             'saved': tab['state'].get('revision', 0) == tab['state'].get('saved_revision', 0)}
+            for index, tab in enumerate(self.workspace.tabs)
+            if index != self.workspace.active and tab['packed'] is not None
+        ]
+
+    def _unsaved_tab_count(self):
+        """Returns how many open invoices have changes not yet saved as a PDF."""
+        count = sum(1 for tab in self._autosave_tabs() if not tab['saved'])
+        if self._revision != self._saved_revision and (
+            self.doctor_name_var.get().strip() or any(self.items.text['product'])
+        ):
+            count += 1
+        return count
+
+    def _restore_autosave(self):
+        """Offers to restore the invoices left unsaved by the last session, then starts autosaving."""
+        record = self.journal.recover()
+        tabs = self.journal.recover_tabs()
+        restored = False
+        if record is not None or tabs:
+            found = [f"{tab['title'] or 'New Invoice'} (in another tab)" for tab in tabs]
+            if record is not None:
+                item_count = sum(1 for item in record['items'] if item.get('product'))
+                doctor = record['doctor_name'] or "no doctor's name"
+                found.insert(0, f"{doctor}, {item_count} item(s)")
+            if messagebox.askyesno(
+                "Restore Invoice",
+                f"{len(found)} unsaved invoice(s) were found from the last session:\n"
+                + "".join(f"\n  • {line}" for line in found)
+                + "\n\nDo you want to restore them?",
+                parent=self,
+            ):
+                for tab in tabs:
+                    self.workspace.add(tab['title'], tab['packed'], {'revision': 1, 'saved_revision': 0})
+                restored = record is not None and self.load_invoice(record)
+                self._rebuild_tab_bar()
+        self.journal.start(self._autosave_record(), saved=not restored, tabs=self._autosave_tabs())
+
+    def _on_close(self):
+        """Asks before closing with unsaved invoices, then flushes the autosave journal."""
+        unsaved = self._unsaved_tab_count()
+        if unsaved and not messagebox.askyesno(
+            "Exit",
+            f"{unsaved} open invoice(s) have unsaved changes. They will be offered for restore "
+            "the next time the app starts.\n\nExit anyway?",
+            parent=self,
+        ):
+            return
+        self.journal.close()
+        self.destroy()
 
     def print_invoice(self):
-        """Sends the last generated PDF to the default printer."""
+        """Queues the last generated PDF for the default printer; printing runs in the background."""
         if not self.last_pdf_path or not os.path.exists(self.last_pdf_path):
             messagebox.showerror("Error", "No PDF found. Please generate the PDF first before printing.")
             return
-            
-        try:
-            if sys.platform == "win32":
-                os.startfile(self.last_pdf_path, "print")
-            elif sys.platform == "darwin": 
-                os.system(f"lpr {self.last_pdf_path}")
-            else: 
-                os.system(f"lp {self.last_pdf_path}")
-            messagebox.showinfo("Printing", f"Sent '{os.path.basename(self.last_pdf_path)}' to the default printer.")
-        except Exception as e:
-            messagebox.showerror("Printing Error", f"Could not print the file. Please check your printer setup.\nError: {e}")
-            
+
+        if not self._watched_print_jobs:
+            self.after(250, self._poll_print_jobs)
+        self._watched_print_jobs.extend(self.print_queue.submit([self.last_pdf_path]))
+        self.pdf_status_label.config(text=f"Printing '{os.path.basename(self.last_pdf_path)}'...")
+
+    def _poll_print_jobs(self):
+        """Reports the jobs sent with Print Invoice as they finish."""
+        still_running = []
+        for job in self._watched_print_jobs:
+            name = os.path.basename(job['paths'][0])
+            if job['status'] == DONE:
+                self.pdf_status_label.config(text=f"Sent '{name}' to the default printer.")
+            elif job['status'] == FAILED:
+                self.pdf_status_label.config(text="")
+                messagebox.showerror(
+                    "Printing Error",
+                    f"Could not print '{name}'. Please check your printer setup.\nError: {job['message']}",
+                )
+            else:
+                still_running.append(job)
+        self._watched_print_jobs = still_running
+        if still_running:
+            self.after(250, self._poll_print_jobs)
+
     def sanitize_filename(self, name):
         """Removes characters that are illegal in filenames."""
-        invalid_chars = '<>:"/\\|?*'
-        safe_name = name.replace(' ', '_')
-        for char in invalid_chars:
-            safe_name = safe_name.replace(char, '')         
-        return safe_name
+        return sanitize_filename(name)
     
 
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Simple Invoice Generator")
+    parser.add_argument('--diagnostics', action='store_true',
+                        help="show timings in a status bar and log them to timings.log in the app data folder")
+    parser.add_argument('--profile', choices=['session', 'pdf'],
+                        help="run the whole session, or each PDF build, under cProfile and save the stats")
+    return parser.parse_args(argv)
+
+
 if __name__ == "__main__":
-    app = InvoiceApp()
-    app.mainloop()
\ No newline at end of file
+    args = parse_args()
+    print_environment()
+    check_required_libraries()
+    if args.diagnostics:
+        print(f"Logging timings to {instrumentation.enable_log()}")
+    with profiled('session', enabled=args.profile == 'session'):
+        app = InvoiceApp(diagnostics=args.diagnostics, profile_pdf=args.profile == 'pdf')
+        app.mainloop()
\ No newline at end of file
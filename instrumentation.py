@@ -0,0 +1,136 @@
+"""
+Lightweight timing instrumentation and profiling hooks.
+
+Code paths wrap their work in `timed(name)`; every measurement updates the
+in-memory per-name statistics (read by the desktop app's status bar) and,
+once enable_log() has been called, is appended to a rotating log of JSON
+lines. `profiled(name)` runs a block under cProfile and dumps the stats to
+the profiles folder for later inspection with pstats or snakeviz.
+
+Measured names:
+    totals.update    - recomputing and showing the totals
+    widgets.create   - building the main window / new grid rows
+    invoice.data     - collecting the invoice data for export
+    pdf.layout       - laying out the PDF (reportlab build, streamed to the output)
+    pdf.commit       - flushing, syncing and renaming the finished PDF file
+                       into place (its bytes are written during pdf.layout)
+    print.submit     - one submission to the print command
+"""
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+from invoice_core import app_data_dir
+
+LOG_FILENAME = 'timings.log'
+LOG_MAX_BYTES = 1024 * 1024
+LOG_BACKUPS = 3
+PROFILES_FOLDER = 'profiles'
+
+# The timing log's logger, set up by enable_log(). logging is imported only
+# then, as it adds about 10 ms to the app's start-up.
+logger = None
+
+# name -> {'count', 'total_ms', 'max_ms', 'last_ms', 'last_at'}
+_stats = {}
+_stats_lock = threading.Lock()
+
+
+def _json_formatter():
+    """Returns a logging formatter that writes each timing record as one JSON object per line."""
+    import logging
+
+    class JsonFormatter(logging.Formatter):
+        def format(self, record):
+            entry = {'time': self.formatTime(record, '%Y-%m-%dT%H:%M:%S'), 'name': record.msg, 'ms': round(record.ms, 3)}
+            entry.update(record.fields)
+            entry['thread'] = record.threadName
+            return json.dumps(entry)
+
+    return JsonFormatter()
+
+
+def enable_log(path=None):
+    """Starts appending every measurement to a rotating JSON-lines log; returns its path."""
+    global logger
+    import logging
+    from logging.handlers import RotatingFileHandler
+
+    path = path or os.path.join(app_data_dir(), LOG_FILENAME)
+    handler = RotatingFileHandler(path, maxBytes=LOG_MAX_BYTES, backupCount=LOG_BACKUPS, encoding='utf-8')
+    handler.setFormatter(_json_formatter())
+    timings = logging.getLogger('simpleinvoice.timings')
+    timings.propagate = False
+    timings.setLevel(logging.INFO)
+    timings.addHandler(handler)
+    logger = timings
+    return path
+
+
+def log_enabled():
+    """Returns True once enable_log() has been called, so costly log fields can be skipped otherwise."""
+    return logger is not None
+
+
+def record(name, ms, **fields):
+    """Adds one measurement in milliseconds, with optional context fields for the log."""
+    with _stats_lock:
+        stats = _stats.get(name)
+        if stats is None:
+            stats = _stats[name] = {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+        stats['count'] += 1
+        stats['total_ms'] += ms
+        stats['max_ms'] = max(stats['max_ms'], ms)
+        stats['last_ms'] = ms
+        stats['last_at'] = time.time()
+    if logger is not None:
+        logger.info(name, extra={'ms': ms, 'fields': fields})
+
+
+@contextmanager
+def timed(name, **fields):
+    """Measures the duration of a block (including one that raises) under `name`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000, **fields)
+
+
+def stats():
+    """Returns a copy of the statistics of every name measured so far."""
+    with _stats_lock:
+        return {name: dict(values) for name, values in _stats.items()}
+
+
+def profiles_dir():
+    """Returns the folder profile dumps are written to, creating it if needed."""
+    path = os.path.join(app_data_dir(), PROFILES_FOLDER)
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+@contextmanager
+def profiled(name, enabled=True):
+    """
+    Runs a block under cProfile and writes the stats to
+    profiles/<name>-<timestamp>.prof in the app data folder. Only the
+    calling thread is profiled.
+    """
+    if not enabled:
+        yield
+        return
+    import cProfile
+
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        stamp = time.strftime('%Y%m%d-%H%M%S') + f"-{int(time.time() * 1000) % 1000:03d}"
+        path = os.path.join(profiles_dir(), f"{name}-{stamp}.prof")
+        profile.dump_stats(path)
+        print(f"Profile written to {path}")
@@ -0,0 +1,229 @@
+"""
+Command-line batch renderer: reads invoices from a CSV or JSONL file and
+renders their PDFs across a pool of worker processes.
+
+    python invoice_batch.py invoices.jsonl --output-dir out --workers 8
+
+JSONL input has one invoice per line:
+    {"invoice_id": "1001", "doctor_name": "...", "date": "01-10-2025",
+     "discount_percent": "5", "items": [{"product": "...", "qty": "2", ...}]}
+Items may also be full row lists, as produced by InvoiceApp._get_invoice_data.
+
+CSV input has one line item per row with an `invoice_id` column; consecutive
+rows with the same invoice_id form one invoice, and doctor_name, date and
+discount_percent are taken from its first row.
+
+Rendered PDFs are kept in the content-addressed cache shared with the
+desktop app (see pdf_cache.py), so invoices rendered before are copied
+instead of laid out again. Use --no-cache to always render.
+
+PDFs are named after their invoice_id, or with --numbered after sequential
+invoice numbers that stay unique across every process writing to the
+output folder (see invoice_numbers.py). Each file is written to a temporary
+name and renamed into place.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from functools import lru_cache
+from itertools import dropwhile
+
+from invoice_core import ITEM_DEFAULTS, invoice_from_record, invoice_filename, sanitize_filename, validate_invoice
+from invoice_numbers import InvoiceNumbers, format_invoice_number
+from invoice_pdf import build_invoice_pdf
+from pdf_cache import PdfCache, default_cache_dir
+
+
+def read_jsonl(path):
+    """Yields (invoice_id, record) for each non-blank line of a JSONL file."""
+    with open(path, encoding='utf-8') as f:
+        for line_number, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                # Let the error surface as a failed invoice instead of aborting the run
+                record = {'error': f"Invalid JSON: {e}"}
+            if not isinstance(record, dict):
+                record = {'error': "Expected a JSON object"}
+            invoice_id = record.get('invoice_id')
+            yield str(line_number if invoice_id in (None, '') else invoice_id), record
+
+
+def _is_preamble(line):
+    """Returns True for a blank or '#' comment line, as may come before a CSV file's header row."""
+    return not line.strip() or line.lstrip().startswith('#')
+
+
+def read_csv(path):
+    """
+    Yields (invoice_id, record) for each group of rows sharing an invoice_id.
+    Blank and '#' comment lines before the header row are skipped.
+    """
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        invoice_id, record = None, None
+        for row in csv.DictReader(dropwhile(_is_preamble, f)):
+            row_id = row.get('invoice_id') or ''
+            if record is None or row_id != invoice_id:
+                if record is not None:
+                    yield invoice_id, record
+                invoice_id = row_id
+                record = {
+                    'doctor_name': row.get('doctor_name', ''),
+                    'date': row.get('date', ''),
+                    'discount_percent': row.get('discount_percent') or '0',
+                    'items': [],
+                }
+            record['items'].append({key: row[key] for key in ITEM_DEFAULTS if row.get(key) is not None})
+        if record is not None:
+            yield invoice_id, record
+
+
+def read_invoices(path):
+    """Reads invoices from a .csv file, or from JSONL for any other extension."""
+    if path.lower().endswith('.csv'):
+        return read_csv(path)
+    return read_jsonl(path)
+
+
+@lru_cache(maxsize=None)
+def _pdf_cache(cache_dir):
+    """Returns this process's handle on the PDF cache folder."""
+    return PdfCache(cache_dir)
+
+
+@lru_cache(maxsize=None)
+def _invoice_numbers(output_dir, block_size):
+    """Returns this process's invoice number allocator for the output folder."""
+    return InvoiceNumbers(output_dir, block_size)
+
+
+def render_invoice(invoice_id, record, output_dir, cache_dir=None, number_block=0):
+    """
+    Renders one invoice record to a PDF in `output_dir`, through the PDF
+    cache in `cache_dir` if given. With a `number_block` size the file is
+    named after the next invoice number of the folder instead of invoice_id.
+    Returns (invoice_id, path, error) where exactly one of path/error is set.
+    """
+    try:
+        if 'error' in record:
+            return invoice_id, None, record['error']
+        data = invoice_from_record(record)
+        error = validate_invoice(data)
+        if error:
+            return invoice_id, None, error
+        if number_block:
+            suffix = format_invoice_number(_invoice_numbers(output_dir, number_block).allocate())
+        else:
+            suffix = sanitize_filename(invoice_id)
+        path = os.path.join(output_dir, invoice_filename(data, suffix))
+        if cache_dir:
+            _pdf_cache(cache_dir).render(build_invoice_pdf, data, path)
+        else:
+            build_invoice_pdf(data, path)
+        return invoice_id, path, None
+    except Exception as e:
+        return invoice_id, None, f"{type(e).__name__}: {e}"
+
+
+def render_chunk(jobs, output_dir, cache_dir=None, number_block=0):
+    """Worker entry point: renders a list of (invoice_id, record) jobs."""
+    return [render_invoice(invoice_id, record, output_dir, cache_dir, number_block) for invoice_id, record in jobs]
+
+
+def _chunks(invoices, size):
+    chunk = []
+    for job in invoices:
+        chunk.append(job)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def run_batch(invoices, output_dir, workers=None, chunk_size=16, on_result=None, cache_dir=None, numbered=False):
+    """
+    Renders an iterable of (invoice_id, record) across `workers` processes
+    (in-process if workers is 1). Only a bounded number of chunks is in flight
+    at a time, so the input is streamed rather than loaded up front.
+    `on_result(invoice_id, path, error)` is called for every invoice.
+    PDFs go through the PDF cache in `cache_dir` if given. If `numbered`,
+    they are named by invoice number, reserved a chunk's worth at a time.
+    Returns a stats dict.
+    """
+    workers = workers or os.cpu_count() or 1
+    os.makedirs(output_dir, exist_ok=True)
+    stats = {'rendered': 0, 'failed': 0, 'workers': workers}
+    number_block = chunk_size if numbered else 0
+    start = time.perf_counter()
+
+    def collect(results):
+        for invoice_id, path, error in results:
+            stats['failed' if error else 'rendered'] += 1
+            if on_result:
+                on_result(invoice_id, path, error)
+
+    if workers == 1:
+        for chunk in _chunks(invoices, chunk_size):
+            collect(render_chunk(chunk, output_dir, cache_dir, number_block))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = set()
+            for chunk in _chunks(invoices, chunk_size):
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                pending.add(executor.submit(render_chunk, chunk, output_dir, cache_dir, number_block))
+            for future in pending:
+                collect(future.result())
+
+    stats['elapsed'] = time.perf_counter() - start
+    total = stats['rendered'] + stats['failed']
+    stats['per_second'] = total / stats['elapsed'] if stats['elapsed'] > 0 else 0.0
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render invoice PDFs in bulk from a CSV or JSONL file.")
+    parser.add_argument('input', help="CSV or JSONL file with the invoices")
+    parser.add_argument('-o', '--output-dir', default='.', help="folder for the generated PDFs (default: current folder)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="number of worker processes (default: CPU count)")
+    parser.add_argument('--chunk-size', type=int, default=16, help="invoices sent to a worker at a time (default: 16)")
+    parser.add_argument('--errors', help="write failed invoices to this JSONL file")
+    parser.add_argument('--cache-dir', default=None, help="PDF cache folder (default: the one shared with the app)")
+    parser.add_argument('--no-cache', action='store_true', help="always render, without the PDF cache")
+    parser.add_argument('--numbered', action='store_true',
+                        help="name PDFs by sequential invoice number instead of invoice_id")
+    args = parser.parse_args(argv)
+    cache_dir = None if args.no_cache else args.cache_dir or default_cache_dir()
+
+    error_file = open(args.errors, 'w', encoding='utf-8') if args.errors else None
+
+    def report(invoice_id, path, error):
+        if error:
+            print(f"FAILED {invoice_id}: {error}", file=sys.stderr)
+            if error_file:
+                error_file.write(json.dumps({'invoice_id': invoice_id, 'error': error}) + "\n")
+
+    try:
+        stats = run_batch(read_invoices(args.input), args.output_dir, args.workers, args.chunk_size, report, cache_dir, args.numbered)
+    finally:
+        if error_file:
+            error_file.close()
+
+    print(
+        f"Rendered {stats['rendered']} invoices, {stats['failed']} failed, "
+        f"in {stats['elapsed']:.2f}s ({stats['per_second']:.1f} invoices/s, {stats['workers']} workers)"
+    )
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
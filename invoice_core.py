@@ -0,0 +1,592 @@
+"""
+GUI-free invoice model and calculations shared by the desktop app and the
+command-line tools.
+"""
+import csv
+import io
+import os
+from contextlib import contextmanager
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from math import gcd
+
+# Column order of an item row, as shown in the grid and in the PDF.
+ITEM_KEYS = ['serial', 'product', 'packing', 'batch_no', 'qty', 'free', 'rate', 'gst', 'val_excl_gst', 'val_incl_gst']
+
+# Editable columns and the text a new row starts with.
+ITEM_DEFAULTS = {
+    'product': '', 'packing': '', 'batch_no': '',
+    'qty': '0', 'free': '0', 'rate': '0.00', 'gst': '0',
+}
+
+NUMERIC_KEYS = ('qty', 'free', 'rate', 'gst')
+
+# Columns that feed into the item values.
+CALC_KEYS = ('qty', 'rate', 'gst')
+
+# Editable columns in grid order, as expected in an imported table without a header row.
+IMPORT_COLUMNS = [key for key in ITEM_KEYS if key in ITEM_DEFAULTS]
+
+# Header names accepted for imported columns besides the ITEM_DEFAULTS keys
+# (the grid/PDF headings and a few common spreadsheet variants).
+IMPORT_ALIASES = {
+    'product name': 'product', 'name': 'product',
+    'batch': 'batch_no', 'batch no': 'batch_no', 'batch no.': 'batch_no',
+    'quantity': 'qty', 'gst(%)': 'gst', 'gst %': 'gst', 'gst%': 'gst',
+}
+
+
+# Money is exact: amounts are integers of paise, and quantities, rates and
+# percentages are parsed from their text as exact decimal fractions, never
+# through binary floats. Every rounding is to the paisa, half away from zero:
+#
+#   * an item's Value (Excl. GST) is qty x rate, rounded;
+#   * an item's GST is its rounded value x GST%, rounded, and its
+#     Value (Incl. GST) is the sum of the two;
+#   * the subtotal and the GST sum add up the rounded item amounts exactly;
+#   * the discount is subtotal x discount%, rounded, and the taxable amount
+#     is what remains of the subtotal;
+#   * the total GST is the GST sum scaled down by the discount
+#     (GST sum x taxable / subtotal), rounded once;
+#   * the grand total is taxable amount + total GST.
+#
+# So without a discount the item values incl. GST add up to the grand total.
+
+# Numbers of 10**31 and more, or below 10**-30 (other than 0), are rejected
+# rather than expanded into huge integers.
+MAX_EXPONENT = 30
+
+# Cells of at most this many characters, like '12' or '123.45', skip
+# Decimal: they have at most 15 significant digits, which a float always
+# tells apart, so if their float is a whole number of hundredths (below
+# MAX_PLAIN_HUNDREDTHS) that is their exact value.
+PLAIN_NUMBER_LENGTH = 15
+MAX_PLAIN_HUNDREDTHS = 10 ** 15
+
+# Parsed cells are cached, and the cache starts over once it holds this many.
+PARSE_CACHE_SIZE = 65536
+
+
+_parsed = {}
+
+
+def _parse_new(text):
+    """Parses a cell that is not in the cache (see parse_decimal) and caches it."""
+    number = None
+    if isinstance(text, str) and len(text) <= PLAIN_NUMBER_LENGTH:
+        if text.isdecimal():
+            number = int(text), 1
+        else:
+            try:
+                value = float(text)
+                hundredths = round(value * 100)
+            except (ValueError, OverflowError):
+                pass
+            else:
+                if -MAX_PLAIN_HUNDREDTHS < hundredths < MAX_PLAIN_HUNDREDTHS and hundredths / 100 == value:
+                    number = hundredths, 100
+    if number is None:
+        number = _parse_with_decimal(text)
+    _parsed[text] = number
+    return number
+
+
+def _parse_with_decimal(text):
+    try:
+        number = Decimal(text if isinstance(text, str) else str(text)) if text else Decimal(0)
+    except (InvalidOperation, ValueError, TypeError):
+        return None
+    # adjusted() is the exponent of the leading digit; much cheaper than as_tuple()
+    if not number.is_finite() or abs(number.adjusted()) > MAX_EXPONENT:
+        return None
+    return number.as_integer_ratio()
+
+
+def parse_decimal(text):
+    """
+    Parses a numeric cell (text, or an int/float from the database) exactly,
+    returning (numerator, denominator) with a positive denominator, not
+    necessarily in lowest terms, or None if it is not a finite number.
+    Empty text counts as 0.
+    """
+    if len(_parsed) >= PARSE_CACHE_SIZE:
+        _parsed.clear()
+    return _parsed.get(text) or _parse_new(text)
+
+
+def parse_column(texts):
+    """Returns parse_decimal of every cell in a list."""
+    if len(_parsed) >= PARSE_CACHE_SIZE:
+        _parsed.clear()
+    get = _parsed.get
+    return [get(text) or _parse_new(text) for text in texts]
+
+
+def clear_parse_cache():
+    """Forgets every parsed cell, as in a freshly started app."""
+    _parsed.clear()
+
+
+def round_div(numerator, denominator):
+    """Divides two integers (denominator > 0), rounding half away from zero."""
+    if numerator >= 0:
+        return (2 * numerator + denominator) // (2 * denominator)
+    return -((denominator - 2 * numerator) // (2 * denominator))
+
+
+def parse_amount(text):
+    """Parses a money cell to integer paise, rounded to the paisa, or None if it is not a number."""
+    number = parse_decimal(text)
+    if number is None:
+        return None
+    return round_div(number[0] * 100, number[1])
+
+
+def format_amount(paise):
+    """Formats an amount in integer paise with two decimals, e.g. -1234 as '-12.34'."""
+    sign = '-' if paise < 0 else ''
+    rupees, paise = divmod(abs(paise), 100)
+    return f"{sign}{rupees}.{paise:02d}"
+
+
+def format_percent(text):
+    """Formats a percentage cell exactly, without trailing zeros, e.g. '7.50' as '7.5%'; '' if it is not a number."""
+    number = parse_decimal(text)
+    if number is None:
+        return ''
+    return f"{(Decimal(number[0]) / number[1]).normalize():f}%"
+
+
+def line_amounts(qty, rate, gst):
+    """
+    Returns an item's (value excl. GST, GST amount) in paise from its parsed
+    qty, rate and GST%; (0, 0) if any of them is not a number.
+    """
+    values, gst_amounts = column_amounts((qty,), (rate,), (gst,))
+    return values[0], gst_amounts[0]
+
+
+# Stands in for a row with a cell that is not a number, whose amounts are 0.
+_NOT_A_NUMBER_ROW = ((0, 1), (0, 1), (0, 1))
+
+
+def column_amounts(qtys, rates, gsts):
+    """
+    line_amounts for whole columns of parsed qty, rate and GST%: returns the
+    list of values excl. GST and the list of GST amounts, in paise.
+    """
+    try:
+        return _row_amounts(zip(qtys, rates, gsts))
+    except TypeError:
+        # A None (not a number) cannot be unpacked; such rows count as 0
+        return _row_amounts(row if None not in row else _NOT_A_NUMBER_ROW for row in zip(qtys, rates, gsts))
+
+
+def _row_amounts(rows):
+    values, gst_amounts = [], []
+    add_value, add_gst = values.append, gst_amounts.append
+    for (qty, qty_denominator), (rate, rate_denominator), (gst, gst_denominator) in rows:
+        # round_div, inlined as this runs for every item of an invoice. A
+        # whole qty times a rate in rupees or paise needs no rounding.
+        numerator, denominator = qty * rate * 100, qty_denominator * rate_denominator
+        if denominator == 1 or denominator == 100:
+            value = numerator // denominator
+        elif numerator >= 0:
+            value = (2 * numerator + denominator) // (2 * denominator)
+        else:
+            value = -((denominator - 2 * numerator) // (2 * denominator))
+        add_value(value)
+        numerator, denominator = value * gst, gst_denominator * 100
+        if numerator >= 0:
+            add_gst((2 * numerator + denominator) // (2 * denominator))
+        else:
+            add_gst(-((denominator - 2 * numerator) // (2 * denominator)))
+    return values, gst_amounts
+
+
+def compute_totals(subtotal, gst_sum, discount_percent):
+    """
+    Applies the Global Discount to the summed item values and GST (integer
+    paise) and returns the final totals as a dict of paise.
+    `discount_percent` may be raw text; a negative or invalid one is 0.
+    """
+    discount = parse_decimal(discount_percent)
+    if discount is None or discount[0] < 0:
+        discount = (0, 1)
+
+    # Calculate Discount Amount and Taxable Amount (Subtotal after Discount)
+    discount_amount = round_div(subtotal * discount[0], discount[1] * 100)
+    taxable_amount = subtotal - discount_amount
+
+    # Recalculate GST on the taxable amount at the effective average rate of the items
+    if subtotal > 0:
+        final_gst_amount = round_div(gst_sum * taxable_amount, subtotal)
+    else:
+        final_gst_amount = 0
+
+    return {
+        'subtotal': subtotal,
+        'total_discount': discount_amount,
+        'taxable_amount': taxable_amount,
+        'total_gst': final_gst_amount,
+        'grand_total': taxable_amount + final_gst_amount,
+    }
+
+
+class LineItemStore:
+    """
+    Columnar store of invoice line items and the single source of truth for
+    both the item grid and PDF export.
+
+    The text of every editable cell is kept as typed, while qty/rate/gst are
+    also kept parsed (see parse_decimal; None where a cell is not a number,
+    which makes the row count as zero) alongside each row's value and GST
+    amount in integer paise. Editing a cell updates the running subtotal and
+    GST sum by delta; `extend()` and `recompute()` work on whole columns in
+    one pass. All sums are exact, so they never drift.
+    """
+    def __init__(self):
+        self.text = {key: [] for key in ITEM_DEFAULTS}
+        self.numbers = {key: [] for key in CALC_KEYS}
+        self.value_excl = []
+        self.gst_amount = []
+        self.subtotal = 0
+        self.gst_sum = 0
+
+    def __len__(self):
+        return len(self.value_excl)
+
+    def append(self, values=None):
+        """Adds a row from a dict of cell texts; missing cells use the defaults."""
+        values = values or {}
+        for key, default in ITEM_DEFAULTS.items():
+            self.text[key].append(values.get(key, default))
+        for key, column in self.numbers.items():
+            column.append(parse_decimal(self.text[key][-1]))
+        self.value_excl.append(0)
+        self.gst_amount.append(0)
+        index = len(self) - 1
+        self._compute_row(index)
+        return index
+
+    def extend(self, rows):
+        """Adds many rows (dicts of cell texts), computing them in one pass."""
+        start = len(self)
+        for values in rows:
+            for key, default in ITEM_DEFAULTS.items():
+                self.text[key].append(values.get(key, default))
+        self._compute_columns(start)
+
+    def pop(self):
+        """Removes the last row and its contribution to the totals."""
+        for column in self.text.values():
+            column.pop()
+        for column in self.numbers.values():
+            column.pop()
+        self.subtotal -= self.value_excl.pop()
+        self.gst_sum -= self.gst_amount.pop()
+
+    def clear(self):
+        """Removes every row."""
+        self.__init__()
+
+    def columns(self):
+        """Returns a copy of the editable cell texts as {key: list of texts}."""
+        return {key: list(column) for key, column in self.text.items()}
+
+    def load_columns(self, columns):
+        """Replaces every row with cell texts as returned by columns(), computed in one pass."""
+        self.clear()
+        for key, column in self.text.items():
+            column.extend(columns[key])
+        self._compute_columns(0)
+
+    def is_blank(self, index):
+        """Returns True if a row still holds only the default texts."""
+        return all(self.text[key][index] == default for key, default in ITEM_DEFAULTS.items())
+
+    def get(self, index, key):
+        """Returns the display text of one cell, including the computed columns."""
+        if key == 'serial':
+            return str(index + 1)
+        if key == 'val_excl_gst':
+            return format_amount(self.value_excl[index])
+        if key == 'val_incl_gst':
+            return format_amount(self.value_excl[index] + self.gst_amount[index])
+        return self.text[key][index]
+
+    def set(self, index, key, text):
+        """
+        Stores the text of one editable cell. Returns True if the row's
+        computed values changed.
+        """
+        self.text[key][index] = text
+        if key not in CALC_KEYS:
+            return False
+        self.numbers[key][index] = parse_decimal(text)
+        return self._compute_row(index)
+
+    def _compute_row(self, index):
+        """Recalculates one row's values and applies the change to the sums."""
+        item_val_excl_gst, item_gst_amount = line_amounts(*(self.numbers[key][index] for key in CALC_KEYS))
+
+        old_excl, old_gst = self.value_excl[index], self.gst_amount[index]
+        if old_excl == item_val_excl_gst and old_gst == item_gst_amount:
+            return False
+        self.subtotal += item_val_excl_gst - old_excl
+        self.gst_sum += item_gst_amount - old_gst
+        self.value_excl[index] = item_val_excl_gst
+        self.gst_amount[index] = item_gst_amount
+        return True
+
+    def _compute_columns(self, start):
+        """Parses and computes the rows from `start` onwards in one columnar pass."""
+        for key, column in self.numbers.items():
+            del column[start:]
+            column.extend(parse_column(self.text[key][start:]))
+        value_excl, gst_amount = column_amounts(*(self.numbers[key][start:] for key in CALC_KEYS))
+        del self.value_excl[start:]
+        del self.gst_amount[start:]
+        self.value_excl.extend(value_excl)
+        self.gst_amount.extend(gst_amount)
+
+        if start:
+            self.subtotal += sum(value_excl)
+            self.gst_sum += sum(gst_amount)
+        else:
+            self.subtotal = sum(value_excl)
+            self.gst_sum = sum(gst_amount)
+
+    def recompute(self):
+        """Re-parses every numeric column and rebuilds all values and sums."""
+        self._compute_columns(0)
+
+    def totals(self, discount_percent):
+        """Returns the invoice totals (integer paise) for a Global Discount percentage."""
+        return compute_totals(self.subtotal, self.gst_sum, discount_percent)
+
+    def row(self, index):
+        """Returns one row as a list of display texts in ITEM_KEYS order."""
+        return [self.get(index, key) for key in ITEM_KEYS]
+
+    def rows(self):
+        """Yields the rows that have a product name, as lists of display texts."""
+        products = self.text['product']
+        for index in range(len(self)):
+            if products[index]:
+                yield self.row(index)
+
+
+def gst_breakdown(rates_and_values, discount_percent):
+    """
+    Splits an invoice by GST rate. Takes (gst, value excl. GST) pairs, one
+    per item, with the GST as a cell text or number and the value in paise,
+    and returns {rate: totals}, where
+    each totals dict (in paise) is what compute_totals gives for the items
+    at that rate. The rounding differences between the parts and the whole
+    invoice go to the rate with the largest subtotal, so the parts add up to
+    the invoice totals exactly.
+    """
+    sums = {}
+    for gst, value in rates_and_values:
+        rate = parse_decimal(gst) or (0, 1)
+        common = gcd(*rate)
+        rate = rate[0] // common, rate[1] // common
+        subtotal, gst_sum = sums.get(rate, (0, 0))
+        sums[rate] = subtotal + value, gst_sum + line_amounts((1, 1), (value, 100), rate)[1]
+    parts = {rate: compute_totals(subtotal, gst_sum, discount_percent) for rate, (subtotal, gst_sum) in sums.items()}
+
+    if parts:
+        invoice = compute_totals(sum(item[0] for item in sums.values()), sum(item[1] for item in sums.values()),
+                                 discount_percent)
+        largest = max(parts.values(), key=lambda totals: abs(totals['subtotal']))
+        for name in ('total_discount', 'total_gst'):
+            largest[name] += invoice[name] - sum(totals[name] for totals in parts.values())
+        largest['taxable_amount'] = largest['subtotal'] - largest['total_discount']
+        largest['grand_total'] = largest['taxable_amount'] + largest['total_gst']
+    return {numerator / denominator: totals for (numerator, denominator), totals in parts.items()}
+
+
+def make_invoice_data(store, doctor_name, date, discount_percent):
+    """
+    Returns the structured invoice dict used for PDF export: header fields,
+    the rows that have a product name and the formatted totals.
+    """
+    discount_percent = discount_percent or '0'
+    invoice_data = {
+        'doctor_name': doctor_name,
+        'date': date,
+        'items': list(store.rows()),
+        'discount_percent': discount_percent,
+    }
+    for name, value in store.totals(discount_percent).items():
+        invoice_data[name] = format_amount(value)
+    return invoice_data
+
+
+def item_values(item):
+    """
+    Returns the editable cell texts of an item given either as a dict keyed
+    like ITEM_DEFAULTS or as a full row list in ITEM_KEYS order.
+    """
+    if isinstance(item, dict):
+        return {key: str(item[key]) for key in ITEM_DEFAULTS if item.get(key) is not None}
+    return {key: str(value) for key, value in zip(ITEM_KEYS, item) if key in ITEM_DEFAULTS}
+
+
+def table_rows(text):
+    """
+    Splits pasted or file text into rows of cells: tab-separated if the first
+    line with content (not blank or a '#' comment) has a tab, as a
+    spreadsheet paste does, otherwise CSV. Only that line decides, so a tab
+    inside a later CSV cell or a comma in a pasted cell stays in its cell.
+    """
+    delimiter = ','
+    for line in text.splitlines():
+        line = line.strip()
+        if line and not line.startswith('#'):
+            delimiter = '\t' if '\t' in line else ','
+            break
+    return csv.reader(io.StringIO(text), delimiter=delimiter)
+
+
+def _import_column(name):
+    name = name.strip().lower()
+    if name in ITEM_DEFAULTS:
+        return name
+    return IMPORT_ALIASES.get(name)
+
+
+def parse_item_table(rows):
+    """
+    Reads line items from rows of cell texts, such as a CSV file or a
+    spreadsheet paste. If the first row (after any blank rows and '#'
+    comment rows) names the columns it is used as the header (unknown
+    columns are ignored); otherwise the cells are taken in grid order:
+    product, packing, batch_no, qty, free, rate, gst.
+
+    Every numeric cell is checked before anything is imported. Returns
+    (items, errors): the item dicts of the valid rows, and a
+    (line_number, message) for every rejected row. Blank rows are ignored.
+    """
+    items, errors = [], []
+    columns = None
+    for line_number, row in enumerate(rows, start=1):
+        cells = [cell.strip() for cell in row]
+        if not any(cells):
+            continue
+        if columns is None:
+            if cells[0].startswith('#'):
+                continue
+            header = [_import_column(cell) for cell in cells]
+            if 'product' in header:
+                columns = header
+                continue
+            columns = IMPORT_COLUMNS
+
+        item = {key: cell for key, cell in zip(columns, cells) if key is not None and cell}
+        problems = [
+            f"{key} '{item[key]}' is not a number"
+            for key in NUMERIC_KEYS if key in item and parse_decimal(item[key]) is None
+        ]
+        if not item.get('product'):
+            problems.insert(0, "missing product name")
+        if problems:
+            errors.append((line_number, "; ".join(problems)))
+        else:
+            items.append(item)
+    return items, errors
+
+
+def invoice_from_record(record):
+    """
+    Builds the invoice dict from a plain record (for example one line of a
+    JSONL file): doctor_name, date, optional discount_percent and a list of
+    items. Totals are always recomputed from the items.
+    """
+    store = LineItemStore()
+    store.extend(item_values(item) for item in record.get('items') or [])
+    return make_invoice_data(
+        store,
+        str(record.get('doctor_name') or ''),
+        str(record.get('date') or ''),
+        str(record.get('discount_percent') or '0'),
+    )
+
+
+def validate_invoice(data):
+    """Returns an error message if the invoice cannot be exported, else None."""
+    if not data['doctor_name']:
+        return "Doctor's Name cannot be empty."
+    if not data['items']:
+        return "Cannot generate a PDF with no items."
+    return None
+
+
+def sanitize_filename(name):
+    """Removes characters that are illegal in filenames."""
+    invalid_chars = '<>:"/\\|?*'
+    safe_name = name.replace(' ', '_')
+    for char in invalid_chars:
+        safe_name = safe_name.replace(char, '')
+    return safe_name
+
+
+def invoice_filename(data, suffix):
+    """Returns the PDF filename: Invoice_Name_Date_<suffix>.pdf."""
+    safe_doctor_name = sanitize_filename(data['doctor_name'])
+    return f"Invoice_{safe_doctor_name}_{sanitize_filename(data['date'])}_{suffix}.pdf"
+
+
+# The process umask, read once at import: reading it means setting it, which
+# would race with threads creating files.
+_UMASK = os.umask(0o022)
+os.umask(_UMASK)
+
+
+@contextmanager
+def atomic_output(path):
+    """
+    Opens a temporary file next to `path` for writing in binary mode and
+    renames it over `path` only if the block completes, so readers and
+    concurrent writers never see a half-written file. The file gets the
+    permissions open() would have given it, and its data is on disk before
+    the rename, so a power cut leaves the old file or the new one.
+    """
+    # Imported here as it adds several milliseconds to the app's start-up
+    import tempfile
+
+    folder, name = os.path.split(os.path.abspath(path))
+    fd, temp_path = tempfile.mkstemp(dir=folder, prefix=f".{name}.", suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        # mkstemp creates the file readable by its owner only
+        os.chmod(temp_path, 0o666 & ~_UMASK)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+
+
+def app_data_dir():
+    """
+    Returns the folder for the app's local data (invoice database, catalog,
+    autosave), creating it if needed. Set SIMPLEINVOICE_HOME to override.
+    """
+    path = os.environ.get('SIMPLEINVOICE_HOME') or os.path.join(os.path.expanduser('~'), '.simpleinvoice')
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def parse_invoice_date(text):
+    """Converts a 'dd-mm-yyyy' invoice date to ISO 'yyyy-mm-dd', or None if it is not a valid date."""
+    try:
+        return datetime.strptime(text.strip(), '%d-%m-%Y').date().isoformat()
+    except (ValueError, AttributeError):
+        return None
@@ -0,0 +1,267 @@
+"""
+Crash-safe autosave of the invoice being edited, so it can be restored
+after a crash or power loss.
+
+Every edit is appended to a journal file as a small JSON delta. A
+background thread writes and fsyncs the deltas, applies them to its own
+copy of the invoice, and every so often compacts that copy into a snapshot
+file and empties the journal. The UI thread only queues deltas, so the cost
+of an edit does not depend on the size of the invoice.
+
+Only the invoice in the editor is journaled edit by edit. The invoices in
+the other workspace tabs are already packed, so whenever the tabs change
+they are written whole to a separate tabs file.
+"""
+import base64
+import json
+import os
+import queue
+import threading
+
+from invoice_core import ITEM_DEFAULTS, app_data_dir, item_values
+
+SNAPSHOT_FILENAME = 'autosave.json'
+JOURNAL_FILENAME = 'autosave.journal'
+TABS_FILENAME = 'autosave_tabs.json'
+
+# Journal entries written before the writer compacts them into a snapshot.
+COMPACT_EVERY = 500
+
+
+def empty_invoice():
+    """Returns the autosave state of a blank invoice."""
+    return {'doctor_name': '', 'date': '', 'discount_percent': '0', 'items': []}
+
+
+def apply_delta(state, delta):
+    """
+    Applies one journal delta to an autosave state (header fields plus item
+    dicts holding only the cells that differ from the defaults).
+    """
+    op = delta['op']
+    if op == 'set':
+        item = state['items'][delta['index']]
+        if delta['value'] == ITEM_DEFAULTS.get(delta['key']):
+            item.pop(delta['key'], None)
+        else:
+            item[delta['key']] = delta['value']
+    elif op == 'header':
+        state[delta['key']] = delta['value']
+    elif op == 'append':
+        state['items'].extend(item_values(item) for item in delta['items'])
+    elif op == 'pop':
+        del state['items'][-delta.get('count', 1):]
+    elif op == 'load':
+        state.clear()
+        state.update(empty_invoice())
+        state.update({key: delta['invoice'][key] for key in ('doctor_name', 'date', 'discount_percent')})
+        state['items'] = [item_values(item) for item in delta['invoice']['items']]
+
+
+def has_content(state):
+    """Returns True if an autosave state holds anything worth restoring."""
+    return bool(state['doctor_name'].strip()) or any(item for item in state['items'])
+
+
+class AutosaveJournal:
+    """
+    Append-only autosave journal with periodic snapshots, written by a
+    background thread. Call recover() once at startup, then start() with the
+    invoice the editor begins with, and record() for every edit.
+
+    Deltas carry a sequence number and the snapshot remembers the last one it
+    includes, so a crash between writing a snapshot and emptying the journal
+    never applies a delta twice.
+
+    The other open tabs are passed to record_tabs() as dicts with a 'title',
+    the 'packed' invoice bytes and a 'saved' flag, and read back by
+    recover_tabs().
+    """
+    def __init__(self, folder=None):
+        folder = folder or app_data_dir()
+        self.snapshot_path = os.path.join(folder, SNAPSHOT_FILENAME)
+        self.journal_path = os.path.join(folder, JOURNAL_FILENAME)
+        self.tabs_path = os.path.join(folder, TABS_FILENAME)
+        self._queue = queue.Queue()
+        self._thread = None
+        # Owned by the writer thread once started
+        self._tabs = []
+        self._state = None
+        self._seq = 0
+        self._saved = True
+        self._entries = 0
+        self._journal = None
+
+    def recover(self):
+        """
+        Reads the snapshot and replays the journal. Returns the last invoice
+        as a record (doctor_name, date, discount_percent, items) if it has
+        unsaved changes, else None.
+        """
+        state, seq, saved = empty_invoice(), 0, True
+        try:
+            with open(self.snapshot_path, encoding='utf-8') as f:
+                snapshot = json.load(f)
+            state.update(snapshot['invoice'])
+            seq, saved = snapshot['seq'], snapshot['saved']
+        except (OSError, ValueError, KeyError, TypeError):
+            pass
+
+        try:
+            with open(self.journal_path, 'rb') as f:
+                for line in f:
+                    try:
+                        delta = json.loads(line)
+                    except ValueError:
+                        # A torn write at the end of the journal; nothing after it is reliable
+                        break
+                    if delta['seq'] <= seq:
+                        continue
+                    seq = delta['seq']
+                    if delta['op'] == 'saved':
+                        saved = True
+                        continue
+                    try:
+                        apply_delta(state, delta)
+                    except (IndexError, KeyError, TypeError):
+                        continue
+                    saved = False
+        except OSError:
+            pass
+
+        self._seq = seq
+        if saved or not has_content(state):
+            return None
+        return state
+
+    def recover_tabs(self):
+        """Returns the other tabs of the last session that have unsaved changes, as passed to record_tabs()."""
+        try:
+            with open(self.tabs_path, encoding='utf-8') as f:
+                tabs = json.load(f)['tabs']
+            return [
+                {'title': tab['title'], 'packed': base64.b64decode(tab['packed']), 'saved': False}
+                for tab in tabs if not tab['saved']
+            ]
+        except (OSError, ValueError, KeyError, TypeError):
+            return []
+
+    def start(self, record=None, saved=True, tabs=()):
+        """
+        Starts the writer thread from an invoice record (a blank invoice if
+        None) and the other open tabs, replacing whatever was saved before.
+        """
+        state = empty_invoice()
+        if record is not None:
+            apply_delta(state, {'op': 'load', 'invoice': record})
+        self._state = state
+        self._saved = saved
+        self._tabs = list(tabs)
+        self._thread = threading.Thread(target=self._run, name="autosave", daemon=True)
+        self._thread.start()
+
+    def record(self, op, **fields):
+        """Queues one edit, e.g. record('set', index=3, key='qty', value='10'). Never blocks."""
+        if self._thread is not None:
+            fields['op'] = op
+            self._queue.put(fields)
+
+    def mark_saved(self):
+        """Records that the invoice as it stands has been saved, so it is not offered for restore."""
+        self.record('saved')
+
+    def record_tabs(self, tabs):
+        """Queues the current list of other open tabs, replacing the previous one. Never blocks."""
+        if self._thread is not None:
+            self._queue.put({'op': 'tabs', 'tabs': tabs})
+
+    def close(self, timeout=2.0):
+        """Writes the queued edits and a final snapshot, then stops the writer."""
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join(timeout)
+            self._thread = None
+
+    # --- Writer thread ---
+
+    def _run(self):
+        self._write_tabs()
+        self._compact()
+        while True:
+            deltas = [self._queue.get()]
+            # Group every edit that arrived meanwhile into one write and fsync
+            while True:
+                try:
+                    deltas.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = None in deltas
+            deltas = [delta for delta in deltas if delta is not None]
+            tabs = [delta for delta in deltas if delta['op'] == 'tabs']
+            deltas = [delta for delta in deltas if delta['op'] != 'tabs']
+            try:
+                # Tabs first: after a crash between the two writes, a tab
+                # switched away from is in both files rather than in neither
+                if tabs:
+                    self._tabs = tabs[-1]['tabs']
+                    self._write_tabs()
+                if deltas:
+                    self._append(deltas)
+                if stop or self._entries >= COMPACT_EVERY:
+                    self._compact()
+            except OSError:
+                # Keep the editor usable; the next write or compaction tries again
+                pass
+            if stop:
+                if self._journal is not None:
+                    self._journal.close()
+                return
+
+    def _append(self, deltas):
+        lines = []
+        for delta in deltas:
+            self._seq += 1
+            delta['seq'] = self._seq
+            if delta['op'] == 'saved':
+                self._saved = True
+            else:
+                try:
+                    apply_delta(self._state, delta)
+                except (IndexError, KeyError):
+                    continue
+                self._saved = False
+            lines.append(json.dumps(delta, separators=(',', ':')).encode('utf-8') + b'\n')
+
+        if self._journal is None:
+            self._journal = open(self.journal_path, 'ab')
+        self._journal.write(b''.join(lines))
+        self._journal.flush()
+        os.fsync(self._journal.fileno())
+        self._entries += len(lines)
+
+    def _write_tabs(self):
+        """Writes the other open tabs (atomically) to the tabs file."""
+        tabs = [
+            {'title': tab['title'], 'packed': base64.b64encode(tab['packed']).decode('ascii'), 'saved': tab['saved']}
+            for tab in self._tabs
+        ]
+        temp_path = self.tabs_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'tabs': tabs}, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.tabs_path)
+
+    def _compact(self):
+        """Writes the current state as the snapshot (atomically) and empties the journal."""
+        temp_path = self.snapshot_path + '.tmp'
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump({'seq': self._seq, 'saved': self._saved, 'invoice': self._state}, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.snapshot_path)
+
+        if self._journal is not None:
+            self._journal.close()
+        self._journal = open(self.journal_path, 'wb')
+        self._entries = 0
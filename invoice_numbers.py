@@ -0,0 +1,54 @@
+"""
+Sequential invoice numbers that stay unique when several app instances or
+batch workers save into the same folder.
+
+Each output folder keeps its counter in a small SQLite file
+(.invoice_numbers.sqlite). Numbers are reserved in blocks inside an
+exclusive transaction, so concurrent processes never receive the same
+number and a process only touches the counter once per block. Numbers left
+in a block when a process exits are skipped, so use a block size of 1 where
+gaps matter (the desktop app does).
+"""
+import os
+import sqlite3
+import threading
+
+SEQUENCE_FILENAME = '.invoice_numbers.sqlite'
+FIRST_NUMBER = 1
+
+
+def format_invoice_number(number):
+    """Returns the invoice number as used in filenames, zero-padded to six digits."""
+    return f"{number:06d}"
+
+
+class InvoiceNumbers:
+    """Hands out invoice numbers for one output folder, reserving `block_size` at a time."""
+    def __init__(self, folder, block_size=1):
+        self.path = os.path.join(folder, SEQUENCE_FILENAME)
+        self.block_size = max(1, block_size)
+        self._next = self._end = 0
+        self._lock = threading.Lock()
+
+    def _reserve_block(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.execute("CREATE TABLE IF NOT EXISTS sequence (id INTEGER PRIMARY KEY CHECK (id = 1), next INTEGER NOT NULL)")
+            # Takes the write lock up front, so no other process can read the same value
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute("SELECT next FROM sequence WHERE id = 1").fetchone()
+            start = row[0] if row else FIRST_NUMBER
+            conn.execute("INSERT OR REPLACE INTO sequence (id, next) VALUES (1, ?)", (start + self.block_size,))
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+        self._next, self._end = start, start + self.block_size
+
+    def allocate(self):
+        """Returns the next invoice number for this folder."""
+        with self._lock:
+            if self._next >= self._end:
+                self._reserve_block()
+            number = self._next
+            self._next += 1
+            return number
@@ -0,0 +1,317 @@
+"""
+GUI-free PDF layout of an invoice, shared by the desktop app and the batch
+renderer.
+"""
+import time
+from collections import deque
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.lib.units import inch
+
+from instrumentation import log_enabled, record, timed
+from invoice_core import atomic_output, format_amount, format_percent, parse_amount
+
+# Frame padding SimpleDocTemplate leaves above and below the content.
+FRAME_PADDING = 12
+
+ITEMS_HEADER = ["S.No.", "Product Name", "Packing", "Batch No.", "Qty", "Free", "Rate", "GST(%)", "Value\n(Excl. GST)", "Value\n(Incl. GST)"]
+
+
+class InvoiceTemplate:
+    """
+    The fixed parts of the invoice layout: paragraph styles, column widths,
+    spacers and every TableStyle, including both variants of the totals table
+    (with and without a discount row). They are built once per template and
+    reused, so each render only lays out the per-invoice data.
+    """
+    def __init__(self):
+        self.styles = getSampleStyleSheet()
+        self.title_style = self.styles['h1']
+        self.normal_style = self.styles['Normal']
+        self.body_style = self.styles['BodyText']
+
+        # Spacer heights; the Spacers themselves are created per document, since
+        # platypus marks a flowable it postpones to the next page and a shared
+        # instance would carry that mark into the next build.
+        self.title_gap = 0.2 * inch
+        self.section_gap = 0.3 * inch
+
+        self.header_col_widths = [4.5 * inch, 2.5 * inch]
+        self.header_style = TableStyle([
+            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+            ('ALIGN', (1, 0), (1, 0), 'RIGHT')
+        ])
+
+        self.items_col_widths = [0.4*inch, 2*inch, 0.8*inch, 0.8*inch, 0.4*inch, 0.4*inch, 0.5*inch, 0.6*inch, 0.8*inch, 0.8*inch]
+        self.items_style = TableStyle([
+            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+            ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black),
+
+            ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+
+            ('ALIGN', (4, 1), (-1, -1), 'RIGHT'),
+            ('PADDING', (4,1), (-1, -1), 4)
+        ])
+
+        # --- Totals Table Styling, one variant per layout ---
+        totals_base = [
+            ('ALIGN', (0, 0), (0, -1), 'RIGHT'),
+            ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+            ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+            ('GRID', (0, 0), (-1, -1), 1, colors.black)
+        ]
+        self.totals_col_widths = [2.2*inch, 1*inch]
+        self.totals_styles = {
+            # With a discount row (Row index 1, bold), Grand Total is at Row index 4
+            True: TableStyle(totals_base + [
+                ('FONTNAME', (0, 1), (1, 1), 'Helvetica-Bold'),
+                ('FONTNAME', (0, 4), (1, 4), 'Helvetica-Bold'),
+            ]),
+            # Without it, Grand Total is at Row index 3
+            False: TableStyle(totals_base + [
+                ('FONTNAME', (0, 3), (1, 3), 'Helvetica-Bold'),
+            ]),
+        }
+
+        self.wrapper_col_widths = [7.4*inch]
+        self.wrapper_style = TableStyle([
+            ('ALIGN', (0,0), (0,0), 'RIGHT')
+        ])
+
+        # Measured on first use by measure_rows()
+        self._row_heights = None
+
+    def measure_rows(self):
+        """
+        Returns the (header row, one-line item row, extra line) heights of the
+        items table, measured once.
+        """
+        if self._row_heights is None:
+            probe = self.items_table([['0'] * len(ITEMS_HEADER), ['0\n0'] * len(ITEMS_HEADER)])
+            probe.wrap(sum(self.items_col_widths), letter[1])
+            header_height, row_height, two_line_height = probe._rowHeights
+            self._row_heights = (header_height, row_height, two_line_height - row_height)
+        return self._row_heights
+
+    def row_height(self, row):
+        """Returns the height of an item row, which grows by a line for every line break in its tallest cell."""
+        _, row_height, line_height = self.measure_rows()
+        return row_height + line_height * max(str(cell).count('\n') for cell in row)
+
+    def page_room(self, doc, used_height=0):
+        """Returns the height left for item rows (below the header row) under `used_height`."""
+        header_height = self.measure_rows()[0]
+        return doc.height - FRAME_PADDING - used_height - header_height
+
+    def header_flowables(self, data):
+        """Returns the title and the Doctor's Name / Date header."""
+        # Paragraph text is markup, so '<' and '&' in the fields must be escaped
+        header_data = [
+            [Paragraph(f"<b>Doctor's Name:</b> {escape(data['doctor_name'])}", self.normal_style),
+             Paragraph(f"<b>Date:</b> {escape(data['date'])}", self.normal_style)]
+        ]
+        header_table = Table(header_data, colWidths=self.header_col_widths)
+        header_table.setStyle(self.header_style)
+        return [Paragraph("INVOICE", self.title_style), Spacer(1, self.title_gap), header_table, Spacer(1, self.section_gap)]
+
+    def items_table(self, items):
+        """Returns the items table for a list of item rows."""
+        invoice_table = Table([ITEMS_HEADER] + list(items), colWidths=self.items_col_widths)
+        invoice_table.setStyle(self.items_style)
+        return invoice_table
+
+    def totals_flowable(self, data):
+        """Returns the right-aligned totals table, with the discount row only if there is a discount."""
+        has_discount = (parse_amount(data['total_discount']) or 0) > 0
+
+        totals_data = [["Subtotal (Pre-Discount):", data['subtotal']]]
+        if has_discount:
+            discount_display = format_percent(data['discount_percent'])
+            totals_data.append([
+                Paragraph(f"<b>Discount ({discount_display}):</b>", self.body_style),
+                f"-{data['total_discount']}"
+            ])
+        totals_data.append(["Taxable Amount (Excl. GST):", data['taxable_amount']])
+        totals_data.append(["Total GST:", data['total_gst']])
+        totals_data.append([Paragraph("<b>Grand Total:</b>", self.body_style), data['grand_total']])
+
+        totals_table = Table(totals_data, colWidths=self.totals_col_widths)
+        totals_table.setStyle(self.totals_styles[has_discount])
+
+        wrapper_table = Table([[totals_table]], colWidths=self.wrapper_col_widths)
+        wrapper_table.setStyle(self.wrapper_style)
+        return wrapper_table
+
+    def _flowables_height(self, flowables, doc):
+        """Returns a (slightly generous) estimate of the height a list of flowables takes."""
+        height = 0
+        for flowable in flowables:
+            height += flowable.wrap(doc.width, doc.height)[1]
+            height += flowable.getSpaceBefore() + flowable.getSpaceAfter()
+        return height
+
+    def _forward_row(self, label, value_excl, value_incl):
+        return ["", label, "", "", "", "", "", "", format_amount(value_excl), format_amount(value_incl)]
+
+    def streamed_items(self, items, first_room, page_room):
+        """
+        Yields the items as page-sized tables, each with the header row. Every
+        page but the last ends with a "Carried forward" row and every page but
+        the first starts with a "Brought forward" row holding the running
+        Value (Excl./Incl. GST) totals. Each row is measured (see row_height),
+        so rows with line breaks fill a page no further than plain ones; rows
+        are pulled from `items` one page at a time.
+        """
+        items = iter(items)
+        # Rows pulled from `items` that did not fit on the previous page
+        pending = deque()
+        forward_height = self.measure_rows()[1]
+        forward_excl = forward_incl = 0
+        first_page = True
+
+        while True:
+            room = first_room if first_page else page_room - forward_height
+            page_rows, heights = [], []
+            used = 0
+            last_page = False
+            while True:
+                row = pending.popleft() if pending else next(items, None)
+                if row is None:
+                    last_page = True
+                    break
+                height = self.row_height(row)
+                if page_rows and used + height > room:
+                    pending.appendleft(row)
+                    break
+                page_rows.append(row)
+                heights.append(height)
+                used += height
+            if not last_page:
+                # Leave room for the Carried forward row
+                while len(page_rows) > 1 and used + forward_height > room:
+                    used -= heights.pop()
+                    pending.appendleft(page_rows.pop())
+
+            rows = [ITEMS_HEADER]
+            extra_rows = []
+            if not first_page:
+                extra_rows.append(len(rows))
+                rows.append(self._forward_row("Brought forward", forward_excl, forward_incl))
+            rows.extend(page_rows)
+            for row in page_rows:
+                forward_excl += parse_amount(row[8]) or 0
+                forward_incl += parse_amount(row[9]) or 0
+            if not last_page:
+                extra_rows.append(len(rows))
+                rows.append(self._forward_row("Carried forward", forward_excl, forward_incl))
+
+            # repeatRows only matters if a row is taller than a whole page
+            table = Table(rows, colWidths=self.items_col_widths, repeatRows=1)
+            table.setStyle(self.items_style)
+            table.setStyle([('FONTNAME', (1, index), (-1, index), 'Helvetica-Bold') for index in extra_rows])
+            yield table
+            if last_page:
+                return
+            yield PageBreak()
+            first_page = False
+
+    def render(self, data, path, streaming=None):
+        """
+        Lays out and writes the PDF for an invoice dict to a path or file object.
+
+        In streaming mode the items are emitted from an iterator as page-sized
+        tables (see streamed_items), so each table is laid out on its own and
+        `data['items']` may be any iterable. Finished pages are still kept by
+        reportlab until the document is saved, so memory grows with the
+        invoice (about 30 MB at 2,000 items and 60 MB at 20,000). By default
+        streaming is used when the items are not a list or do not fit on the
+        first page; a one-page invoice looks the same either way.
+        """
+        doc = SimpleDocTemplate(path, pagesize=letter)
+        header = self.header_flowables(data)
+        items = data['items']
+        first_room = self.page_room(doc, self._flowables_height(header, doc))
+        if streaming is None:
+            streaming = not isinstance(items, list) or sum(map(self.row_height, items)) > first_room
+
+        if not streaming:
+            elements = header
+            elements.append(self.items_table(items))
+            elements.append(Spacer(1, self.section_gap))
+            elements.append(self.totals_flowable(data))
+            doc.build(elements)
+            return
+
+        def flowables():
+            yield from header
+            yield from self.streamed_items(items, first_room, self.page_room(doc))
+            yield Spacer(1, self.section_gap)
+            yield self.totals_flowable(data)
+
+        doc.build(_LazyFlowables(flowables()))
+
+
+class _LazyFlowables(list):
+    """
+    A flowable list for doc.build() that pulls from an iterator whenever it
+    runs low. Platypus only ever looks at the first couple of flowables, so
+    each page's table is only built when platypus reaches it.
+    """
+    LOOKAHEAD = 2
+
+    def __init__(self, iterator):
+        super().__init__()
+        self._iterator = iterator
+
+    def __len__(self):
+        while super().__len__() < self.LOOKAHEAD:
+            flowable = next(self._iterator, None)
+            if flowable is None:
+                break
+            self.append(flowable)
+        return super().__len__()
+
+
+@lru_cache(maxsize=None)
+def default_template():
+    """Returns the shared InvoiceTemplate, building it on first use."""
+    return InvoiceTemplate()
+
+
+def build_invoice_pdf(data, path):
+    """
+    Lays out and writes the PDF for an invoice dict, in the shape returned by
+    InvoiceApp._get_invoice_data / invoice_core.make_invoice_data.
+
+    The document is streamed straight to its output rather than held in
+    memory. A path is written through a temporary file and renamed into
+    place, so it never holds a partial PDF. The bytes are written during
+    `pdf.layout`; `pdf.commit` measures the final flush, fsync and rename.
+    When the timing log is on, each layout is tagged with the invoice's
+    content hash so repeated renders of one invoice can be told apart.
+    """
+    items = data['items']
+    fields = {'items': len(items) if isinstance(items, list) else None}
+    if log_enabled() and isinstance(items, list):
+        from pdf_cache import invoice_key
+        fields['invoice'] = invoice_key(data)[:16]
+    if hasattr(path, 'write'):
+        with timed('pdf.layout', **fields):
+            default_template().render(data, path)
+        return
+    with atomic_output(path) as f:
+        with timed('pdf.layout', **fields):
+            default_template().render(data, f)
+        size = f.tell()
+        start = time.perf_counter()
+    record('pdf.commit', (time.perf_counter() - start) * 1000, bytes=size)
@@ -0,0 +1,307 @@
+"""
+Local HTTP service that computes invoice totals and renders PDFs for other
+programs (web portal, POS terminals), using the same code as the app.
+
+    python invoice_service.py --port 8765 --workers 4 --queue-size 32
+
+Endpoints (request bodies are invoice JSON in the shape of
+InvoiceApp._get_invoice_data: doctor_name, date, discount_percent and items
+as dicts or full row lists; totals are always recomputed from the items):
+
+    POST /totals    -> {"subtotal": "...", ..., "grand_total": "...", "items": [...]}
+    POST /pdf       -> the PDF (application/pdf), totals in X-Invoice-* headers;
+                       with ?format=json, the totals plus the PDF in base64
+    GET  /metrics   -> request counts, queue depth and latency percentiles
+    GET  /health    -> {"status": "ok"}
+
+PDFs are rendered by a pool of worker processes that import reportlab and
+build the layout template before the first request. At most
+workers + queue-size renders are accepted at a time; beyond that the
+service answers 503 with Retry-After instead of queueing without bound.
+"""
+import argparse
+import base64
+import json
+import math
+import os
+import statistics
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from invoice_core import invoice_from_record, validate_invoice
+
+TOTAL_FIELDS = ('subtotal', 'total_discount', 'taxable_amount', 'total_gst', 'grand_total')
+MAX_BODY_BYTES = 16 * 1024 * 1024
+RENDER_TIMEOUT = 120
+# Latency samples kept per endpoint for the percentiles in /metrics.
+LATENCY_SAMPLES = 1000
+
+
+class InvoiceError(ValueError):
+    """An invoice that cannot be rendered, reported to the client as 422."""
+
+
+class BadRequest(ValueError):
+    """A request that cannot be read, reported to the client with `status` (400 by default)."""
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def compute_invoice(record):
+    """Returns the invoice data dict for a request body, raising InvoiceError if it is not usable."""
+    if not isinstance(record, dict):
+        raise InvoiceError("Expected a JSON object")
+    if not isinstance(record.get('items') or [], list):
+        raise InvoiceError("'items' must be a list")
+    try:
+        data = invoice_from_record(record)
+    except (TypeError, ValueError, AttributeError) as e:
+        raise InvoiceError(f"Invalid invoice: {e}")
+    return data
+
+
+def _warm_worker():
+    """Worker initializer: imports reportlab and builds the layout template up front."""
+    from invoice_pdf import default_template
+    default_template().measure_rows()
+
+
+def render_pdf(data):
+    """Worker entry point: returns (PDF bytes, render seconds) for an invoice data dict."""
+    import io
+    from invoice_pdf import build_invoice_pdf
+
+    start = time.perf_counter()
+    buffer = io.BytesIO()
+    build_invoice_pdf(data, buffer)
+    return buffer.getvalue(), time.perf_counter() - start
+
+
+class ServiceMetrics:
+    """Thread-safe request counters and per-endpoint latency samples."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counts = {}
+        self.latencies = {}
+        self.in_flight = 0
+        self.rejected = 0
+        self.started_at = time.time()
+
+    def reject(self):
+        """Counts a render refused because the service was at capacity."""
+        with self._lock:
+            self.rejected += 1
+
+    def enter(self):
+        """Counts a render accepted; leave() is called once it has finished."""
+        with self._lock:
+            self.in_flight += 1
+
+    def leave(self):
+        with self._lock:
+            self.in_flight -= 1
+
+    def record(self, endpoint, status, seconds):
+        with self._lock:
+            key = f"{endpoint} {status}"
+            self.counts[key] = self.counts.get(key, 0) + 1
+            samples = self.latencies.get(endpoint)
+            if samples is None:
+                samples = self.latencies[endpoint] = deque(maxlen=LATENCY_SAMPLES)
+            samples.append(seconds * 1000)
+
+    def snapshot(self):
+        with self._lock:
+            latency = {}
+            for endpoint, samples in self.latencies.items():
+                ordered = sorted(samples)
+                latency[endpoint] = {
+                    'count': len(ordered),
+                    'p50_ms': round(statistics.median(ordered), 2),
+                    # Nearest-rank percentile
+                    'p95_ms': round(ordered[math.ceil(len(ordered) * 0.95) - 1], 2),
+                    'max_ms': round(ordered[-1], 2),
+                }
+            return {
+                'uptime_s': round(time.time() - self.started_at, 1),
+                'in_flight': self.in_flight,
+                'rejected': self.rejected,
+                'requests': dict(self.counts),
+                'latency': latency,
+            }
+
+
+class InvoiceService:
+    """The worker pool, admission control and metrics shared by all request threads."""
+    def __init__(self, workers=None, queue_size=32):
+        self.workers = workers or os.cpu_count() or 1
+        self.capacity = self.workers + queue_size
+        self._slots = threading.BoundedSemaphore(self.capacity)
+        self.metrics = ServiceMetrics()
+        self.executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_warm_worker)
+        # Start every worker now so the first requests do not pay for process start-up
+        for future in [self.executor.submit(time.sleep, 0) for _ in range(self.workers)]:
+            future.result()
+
+    def render(self, data):
+        """
+        Renders a PDF on the pool. Returns (PDF bytes, queue seconds, render
+        seconds), or None if the service is at capacity.
+
+        The slot is held until the render itself finishes, not until this
+        call returns, so renders abandoned after a timeout still count
+        against the capacity while they occupy a worker.
+        """
+        if not self._slots.acquire(blocking=False):
+            self.metrics.reject()
+            return None
+        self.metrics.enter()
+        start = time.perf_counter()
+        try:
+            future = self.executor.submit(render_pdf, data)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda future: self._release())
+        pdf, render_seconds = future.result(timeout=RENDER_TIMEOUT)
+        return pdf, time.perf_counter() - start - render_seconds, render_seconds
+
+    def _release(self):
+        self.metrics.leave()
+        self._slots.release()
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+class InvoiceRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SimpleInvoice/2.0"
+    # Set on the handler subclass created by make_server()
+    service = None
+
+    def log_message(self, format, *args):
+        # Latency is in /metrics; keep stderr for errors only
+        pass
+
+    def _send(self, status, body, content_type='application/json', headers=None):
+        if not isinstance(body, bytes):
+            body = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+        return status
+
+    def _read_invoice(self):
+        length = self.headers.get('Content-Length')
+        if length is None:
+            raise BadRequest("Content-Length required", 411)
+        try:
+            length = int(length)
+        except ValueError:
+            length = -1
+        if length < 0:
+            raise BadRequest(f"Invalid Content-Length: {self.headers.get('Content-Length')!r}")
+        if length > MAX_BODY_BYTES:
+            raise BadRequest("Request body too large", 413)
+        try:
+            record = json.loads(self.rfile.read(length) or b'null')
+        except ValueError as e:
+            raise BadRequest(f"Invalid JSON: {e}")
+        return compute_invoice(record)
+
+    def do_GET(self):
+        start = time.perf_counter()
+        path = urlsplit(self.path).path
+        if path == '/health':
+            status = self._send(200, {'status': 'ok'})
+        elif path == '/metrics':
+            status = self._send(200, self.service.metrics.snapshot())
+        else:
+            # Unknown paths share one bucket, so /metrics cannot grow without bound
+            path = 'other'
+            status = self._send(404, {'error': "Not found"})
+        self.service.metrics.record(f"GET {path}", status, time.perf_counter() - start)
+
+    def do_POST(self):
+        start = time.perf_counter()
+        url = urlsplit(self.path)
+        try:
+            if url.path == '/totals':
+                data = self._read_invoice()
+                status = self._send(200, data)
+            elif url.path == '/pdf':
+                status = self._post_pdf(self._read_invoice(), parse_qs(url.query).get('format', ['pdf'])[0])
+            else:
+                url = url._replace(path='other')
+                status = self._send(404, {'error': "Not found"})
+        except BadRequest as e:
+            status = self._send(e.status, {'error': str(e)})
+        except InvoiceError as e:
+            status = self._send(422, {'error': str(e)})
+        except FutureTimeout:
+            status = self._send(504, {'error': "Rendering timed out"})
+        except Exception as e:
+            status = self._send(500, {'error': f"{type(e).__name__}: {e}"})
+        self.service.metrics.record(f"POST {url.path}", status, time.perf_counter() - start)
+
+    def _post_pdf(self, data, response_format):
+        error = validate_invoice(data)
+        if error:
+            raise InvoiceError(error)
+        result = self.service.render(data)
+        if result is None:
+            return self._send(503, {'error': "Service busy, try again"}, headers={'Retry-After': '1'})
+        pdf, queue_seconds, render_seconds = result
+        timing = {'X-Queue-Ms': f"{queue_seconds * 1000:.1f}", 'X-Render-Ms': f"{render_seconds * 1000:.1f}"}
+        if response_format == 'json':
+            body = {field: data[field] for field in TOTAL_FIELDS}
+            body['pdf_base64'] = base64.b64encode(pdf).decode('ascii')
+            return self._send(200, body, headers=timing)
+        headers = {f"X-Invoice-{field.replace('_', '-').title()}": data[field] for field in TOTAL_FIELDS}
+        headers.update(timing)
+        return self._send(200, pdf, content_type='application/pdf', headers=headers)
+
+
+def make_server(host='127.0.0.1', port=8765, workers=None, queue_size=32):
+    """Returns a ThreadingHTTPServer serving a new InvoiceService."""
+    service = InvoiceService(workers, queue_size)
+    handler = type('Handler', (InvoiceRequestHandler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve invoice totals and PDFs over HTTP.")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on (default: 127.0.0.1)")
+    parser.add_argument('--port', type=int, default=8765, help="port to listen on (default: 8765)")
+    parser.add_argument('-w', '--workers', type=int, default=None, help="PDF worker processes (default: CPU count)")
+    parser.add_argument('--queue-size', type=int, default=32,
+                        help="renders that may wait for a worker before requests are refused (default: 32)")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.host, args.port, args.workers, args.queue_size)
+    print(f"Serving on http://{args.host}:{server.server_port} with {server.service.workers} workers")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        server.service.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
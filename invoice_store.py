@@ -0,0 +1,322 @@
+"""
+Local SQLite database of every generated invoice, with indexed search by
+doctor, date and product, and GST rollups kept up to date as invoices are
+saved. Every amount is stored in integer paise, so sums are exact.
+"""
+import os
+import sqlite3
+from datetime import datetime
+from itertools import groupby
+
+from invoice_core import ITEM_DEFAULTS, app_data_dir, gst_breakdown, parse_amount, parse_invoice_date
+
+DB_FILENAME = 'invoices.db'
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS invoices (
+    id INTEGER PRIMARY KEY,
+    doctor_name TEXT NOT NULL COLLATE NOCASE,
+    date_text TEXT NOT NULL,
+    invoice_date TEXT,
+    discount_percent TEXT NOT NULL,
+    subtotal INTEGER NOT NULL,
+    total_discount INTEGER NOT NULL,
+    taxable_amount INTEGER NOT NULL,
+    total_gst INTEGER NOT NULL,
+    grand_total INTEGER NOT NULL,
+    item_count INTEGER NOT NULL,
+    pdf_path TEXT,
+    created_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS products (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE COLLATE NOCASE
+);
+CREATE TABLE IF NOT EXISTS invoice_items (
+    invoice_id INTEGER NOT NULL REFERENCES invoices(id) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    product_id INTEGER NOT NULL REFERENCES products(id),
+    product_name TEXT NOT NULL,
+    packing TEXT NOT NULL,
+    batch_no TEXT NOT NULL,
+    qty TEXT NOT NULL,
+    free TEXT NOT NULL,
+    rate TEXT NOT NULL,
+    gst TEXT NOT NULL,
+    val_excl_gst INTEGER NOT NULL,
+    val_incl_gst INTEGER NOT NULL,
+    PRIMARY KEY (invoice_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS invoices_doctor ON invoices(doctor_name, invoice_date);
+CREATE INDEX IF NOT EXISTS invoices_date ON invoices(invoice_date);
+CREATE INDEX IF NOT EXISTS invoices_pdf_path ON invoices(pdf_path);
+CREATE INDEX IF NOT EXISTS invoice_items_product ON invoice_items(product_id, invoice_id);
+CREATE TABLE IF NOT EXISTS gst_rollups (
+    day TEXT NOT NULL,
+    doctor_name TEXT NOT NULL COLLATE NOCASE,
+    gst_rate REAL NOT NULL,
+    gross_amount INTEGER NOT NULL,
+    discount_amount INTEGER NOT NULL,
+    taxable_amount INTEGER NOT NULL,
+    gst_amount INTEGER NOT NULL,
+    PRIMARY KEY (day, doctor_name, gst_rate)
+) WITHOUT ROWID;
+"""
+
+# Bumped when existing databases need migrating (see InvoiceStore._migrate).
+SCHEMA_VERSION = 1
+
+# Ways a rollup report can be grouped, as SQL expressions over gst_rollups.
+ROLLUP_GROUPS = {
+    'year': "substr(day, 1, 4)",
+    'month': "substr(day, 1, 7)",
+    'day': "day",
+    'doctor': "doctor_name",
+    'gst_rate': "gst_rate",
+}
+ROLLUP_AMOUNTS = ('gross_amount', 'discount_amount', 'taxable_amount', 'gst_amount')
+
+# Columns of an invoices row written by save(), apart from created_at.
+INVOICE_COLUMNS = ('doctor_name', 'date_text', 'invoice_date', 'discount_percent', 'subtotal', 'total_discount',
+                   'taxable_amount', 'total_gst', 'grand_total', 'item_count', 'pdf_path')
+
+# Editable item columns stored in invoice_items, in ITEM_KEYS order after the product.
+ITEM_COLUMNS = [key for key in ITEM_DEFAULTS if key != 'product']
+
+
+def default_db_path():
+    """Returns the path of the invoice database in the app data folder."""
+    return os.path.join(app_data_dir(), DB_FILENAME)
+
+
+def _like_prefix(text):
+    """Escapes a search string for use as a LIKE prefix pattern."""
+    escaped = text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return escaped + '%'
+
+
+class InvoiceStore:
+    """
+    SQLite-backed store of invoices in WAL mode. Line items are kept in a
+    separate table and linked to a table of distinct product names (matched
+    case-insensitively) for the product search, while each item keeps its
+    name as typed. Doctor name, date and product are indexed so searches stay
+    fast over hundreds of thousands of invoices.
+    """
+    def __init__(self, path=None):
+        self.path = path or default_db_path()
+        self.conn = sqlite3.connect(self.path, timeout=10)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+
+    def _migrate(self):
+        """Brings a database created by an older version up to SCHEMA_VERSION."""
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version < 1:
+            # GST rollups were added; build them from the invoices saved so far
+            with self.conn:
+                self.rebuild_rollups()
+        if version < SCHEMA_VERSION:
+            self.conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    def close(self):
+        self.conn.close()
+
+    def _product_ids(self, names):
+        """Returns {name: id} of the products matching the names case-insensitively, adding any that are new."""
+        ids = {}
+        for name in names:
+            if name in ids:
+                continue
+            row = self.conn.execute("SELECT id FROM products WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                row = (self.conn.execute("INSERT INTO products (name) VALUES (?)", (name,)).lastrowid,)
+            ids[name] = row[0]
+        return ids
+
+    def save(self, data, pdf_path=None):
+        """
+        Saves an invoice dict (as returned by InvoiceApp._get_invoice_data) and
+        returns its id. The PDF path carries the invoice number, so an invoice
+        already stored with the same `pdf_path` was regenerated under its own
+        number: it is replaced (its rollup amounts are taken out again first)
+        rather than counted twice. Any other invoice is added as a new one.
+        """
+        items = data['items']
+        values = (
+            data['doctor_name'], data['date'], parse_invoice_date(data['date']),
+            data['discount_percent'],
+            *(parse_amount(data[name]) for name in ('subtotal', 'total_discount', 'taxable_amount',
+                                                    'total_gst', 'grand_total')),
+            len(items), pdf_path,
+        )
+        # Value excl. and incl. GST of each item
+        amounts = [(parse_amount(row[8]) or 0, parse_amount(row[9]) or 0) for row in items]
+        with self.conn:
+            invoice_id = self._remove_items(pdf_path) if pdf_path is not None else None
+            if invoice_id is not None:
+                self.conn.execute(
+                    f"UPDATE invoices SET {', '.join(f'{name} = ?' for name in INVOICE_COLUMNS)} WHERE id = ?",
+                    values + (invoice_id,),
+                )
+            else:
+                cursor = self.conn.execute(
+                    f"""INSERT INTO invoices ({', '.join(INVOICE_COLUMNS)}, created_at)
+                        VALUES ({', '.join('?' * len(INVOICE_COLUMNS))}, ?)""",
+                    values + (datetime.now().isoformat(timespec='seconds'),),
+                )
+                invoice_id = cursor.lastrowid
+            product_ids = self._product_ids(row[1] for row in items)
+            self.conn.executemany(
+                """INSERT INTO invoice_items (invoice_id, position, product_id, product_name, packing, batch_no,
+                       qty, free, rate, gst, val_excl_gst, val_incl_gst)
+                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)""",
+                (
+                    (invoice_id, position, product_ids[row[1]], row[1], *row[2:8], *amounts[position])
+                    for position, row in enumerate(items)
+                ),
+            )
+            self._add_rollups(
+                parse_invoice_date(data['date']), data['doctor_name'], data['discount_percent'],
+                ((row[7], value_excl) for row, (value_excl, _) in zip(items, amounts)),
+            )
+        return invoice_id
+
+    def _remove_items(self, pdf_path):
+        """
+        Takes the amounts of the invoice stored with a PDF path out of the
+        rollups and deletes its items, ready for it to be saved again. Returns
+        its id, or None if there is no such invoice.
+        """
+        invoice = self.conn.execute(
+            "SELECT id, invoice_date, doctor_name, discount_percent FROM invoices WHERE pdf_path = ?"
+            " ORDER BY id DESC LIMIT 1",
+            (pdf_path,),
+        ).fetchone()
+        if invoice is None:
+            return None
+        invoice_id, invoice_date, doctor_name, discount_percent = invoice
+        rates_and_values = self.conn.execute(
+            "SELECT gst, val_excl_gst FROM invoice_items WHERE invoice_id = ?", (invoice_id,)
+        ).fetchall()
+        self._add_rollups(invoice_date, doctor_name, discount_percent, rates_and_values, sign=-1)
+        # Rows left empty held only this invoice
+        self.conn.execute(
+            f"""DELETE FROM gst_rollups WHERE day = ? AND doctor_name = ?
+                AND {' AND '.join(f'{name} = 0' for name in ROLLUP_AMOUNTS)}""",
+            (invoice_date or '', doctor_name),
+        )
+        self.conn.execute("DELETE FROM invoice_items WHERE invoice_id = ?", (invoice_id,))
+        return invoice_id
+
+    def _add_rollups(self, invoice_date, doctor_name, discount_percent, rates_and_values, sign=1):
+        """Adds one invoice's per-rate amounts (times `sign`) to the rollup rows of its day and doctor."""
+        self.conn.executemany(
+            f"""INSERT INTO gst_rollups (day, doctor_name, gst_rate, {', '.join(ROLLUP_AMOUNTS)})
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (day, doctor_name, gst_rate) DO UPDATE SET
+                {', '.join(f'{name} = {name} + excluded.{name}' for name in ROLLUP_AMOUNTS)}""",
+            (
+                (invoice_date or '', doctor_name, rate, sign * totals['subtotal'], sign * totals['total_discount'],
+                 sign * totals['taxable_amount'], sign * totals['total_gst'])
+                for rate, totals in gst_breakdown(rates_and_values, discount_percent).items()
+            ),
+        )
+
+    def rebuild_rollups(self):
+        """Recomputes every rollup from the saved invoices (call inside a transaction)."""
+        self.conn.execute("DELETE FROM gst_rollups")
+        rows = self.conn.execute(
+            """SELECT i.id, i.invoice_date, i.doctor_name, i.discount_percent, t.gst, t.val_excl_gst
+               FROM invoices i JOIN invoice_items t ON t.invoice_id = i.id
+               ORDER BY i.id"""
+        )
+        for _, invoice_rows in groupby(rows, key=lambda row: row[0]):
+            invoice_rows = list(invoice_rows)
+            _, invoice_date, doctor_name, discount_percent = invoice_rows[0][:4]
+            self._add_rollups(invoice_date, doctor_name, discount_percent, (row[4:] for row in invoice_rows))
+
+    def rollups(self, group_by=('month', 'gst_rate'), date_from=None, date_to=None, doctor=None):
+        """
+        Returns the gross, discount, taxable and GST amounts (paise) summed
+        over the stored rollups, as dicts with one key per `group_by` entry (see
+        ROLLUP_GROUPS) followed by the amounts, in group order.
+        `date_from`/`date_to` are inclusive 'dd-mm-yyyy' dates and `doctor`
+        an exact name (case-insensitive).
+        """
+        columns = [f"{ROLLUP_GROUPS[group]} AS {group}" for group in group_by]
+        where, params = [], []
+        for text, op in ((date_from, '>='), (date_to, '<=')):
+            iso_date = parse_invoice_date(text) if text else None
+            if iso_date:
+                where.append(f"day {op} ? AND day != ''")
+                params.append(iso_date)
+        if doctor:
+            where.append("doctor_name = ?")
+            params.append(doctor)
+
+        sql = f"SELECT {', '.join(columns + [f'SUM({name})' for name in ROLLUP_AMOUNTS])} FROM gst_rollups"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        if group_by:
+            order = ', '.join(group_by)
+            sql += f" GROUP BY {order} ORDER BY {order}"
+        keys = list(group_by) + list(ROLLUP_AMOUNTS)
+        return [dict(zip(keys, row)) for row in self.conn.execute(sql, params)]
+
+    def search(self, doctor=None, date_from=None, date_to=None, product=None, limit=200):
+        """
+        Returns up to `limit` invoice summaries, newest first, as dicts with
+        id, doctor_name, date, item_count, grand_total (paise) and pdf_path.
+        `doctor` and `product` match name prefixes (case-insensitive);
+        `date_from`/`date_to` are inclusive 'dd-mm-yyyy' dates.
+        """
+        where, params = [], []
+        if doctor:
+            where.append("doctor_name LIKE ? ESCAPE '\\'")
+            params.append(_like_prefix(doctor))
+        for text, op in ((date_from, '>='), (date_to, '<=')):
+            iso_date = parse_invoice_date(text) if text else None
+            if iso_date:
+                where.append(f"invoice_date {op} ?")
+                params.append(iso_date)
+        if product:
+            where.append(
+                """id IN (SELECT invoice_id FROM invoice_items WHERE product_id IN
+                       (SELECT id FROM products WHERE name LIKE ? ESCAPE '\\'))"""
+            )
+            params.append(_like_prefix(product))
+
+        sql = "SELECT id, doctor_name, date_text, item_count, grand_total, pdf_path FROM invoices"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY invoice_date DESC, id DESC LIMIT ?"
+        params.append(limit)
+        return [
+            {'id': row[0], 'doctor_name': row[1], 'date': row[2], 'item_count': row[3],
+             'grand_total': row[4], 'pdf_path': row[5]}
+            for row in self.conn.execute(sql, params)
+        ]
+
+    def load(self, invoice_id):
+        """
+        Returns a saved invoice as a record (doctor_name, date,
+        discount_percent and item dicts), or None if there is no such invoice.
+        """
+        row = self.conn.execute(
+            "SELECT doctor_name, date_text, discount_percent FROM invoices WHERE id = ?", (invoice_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        items = [
+            dict(zip(['product'] + ITEM_COLUMNS, item))
+            for item in self.conn.execute(
+                f"""SELECT product_name, {', '.join(ITEM_COLUMNS)}
+                    FROM invoice_items WHERE invoice_id = ? ORDER BY position""",
+                (invoice_id,),
+            )
+        ]
+        return {'doctor_name': row[0], 'date': row[1], 'discount_percent': row[2], 'items': items}
@@ -0,0 +1,64 @@
+"""
+Several open invoices in one window. Only the active invoice lives in the
+editor's widgets and item store; the others are kept packed as compressed
+JSON (a few bytes per line item) and unpacked when their tab is selected.
+"""
+import json
+import zlib
+
+# zlib level for packed invoices: the fastest, since packing happens on every tab switch.
+PACK_LEVEL = 1
+
+
+def pack_invoice(invoice):
+    """Packs an invoice (header fields and item columns) into compressed bytes."""
+    return zlib.compress(json.dumps(invoice, separators=(',', ':')).encode('utf-8'), PACK_LEVEL)
+
+
+def unpack_invoice(packed):
+    """Returns the invoice dict stored by pack_invoice()."""
+    return json.loads(zlib.decompress(packed))
+
+
+class Workspace:
+    """
+    The open invoice tabs, in order, and which one is active. Each tab is a
+    dict with its title, its packed invoice (None while it is active or
+    still blank) and any per-tab editor state, such as the scroll position
+    and the last PDF generated from it.
+    """
+    def __init__(self):
+        self.tabs = [self._new_tab()]
+        self.active = 0
+
+    @staticmethod
+    def _new_tab():
+        return {'title': '', 'packed': None, 'state': {}}
+
+    def __len__(self):
+        return len(self.tabs)
+
+    def add(self, title='', packed=None, state=None):
+        """Appends a tab, blank or holding an invoice packed earlier, and returns its index."""
+        tab = self._new_tab()
+        tab.update(title=title, packed=packed, state=state or {})
+        self.tabs.append(tab)
+        return len(self.tabs) - 1
+
+    def close_active(self):
+        """Closes the active tab (never the last one); the tab after it, or else before it, becomes active."""
+        del self.tabs[self.active]
+        self.active = min(self.active, len(self.tabs) - 1)
+        return self.active
+
+    def store(self, index, invoice, state):
+        """Packs the invoice being left, with the editor state to restore later."""
+        tab = self.tabs[index]
+        tab['packed'] = pack_invoice(invoice)
+        tab['state'] = state
+
+    def take(self, index):
+        """Returns (invoice or None if blank, state) for the tab being shown, releasing its packed copy."""
+        tab = self.tabs[index]
+        packed, tab['packed'] = tab['packed'], None
+        return (unpack_invoice(packed) if packed is not None else None), tab['state']
@@ -0,0 +1,131 @@
+"""
+Content-addressed cache of rendered invoice PDFs, shared by the desktop app
+and the batch renderer.
+
+A PDF is stored under the SHA-256 of its normalized invoice data, so
+rendering an invoice that was rendered before (pressing Generate PDF again,
+or re-running a batch of historical invoices) copies the cached file
+instead of laying it out again. The cache is a plain folder, safe to share
+between processes: entries are written to a temporary file and renamed into
+place, and the least recently used entries are deleted once the folder
+grows past its size limit.
+"""
+import json
+import os
+import shutil
+
+from invoice_core import app_data_dir, atomic_output
+
+CACHE_FOLDER = 'pdf_cache'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Part of every key; bump it when the PDF layout changes so old entries are not reused.
+CACHE_VERSION = 1
+
+# Fields of the invoice data that appear in the PDF.
+KEY_FIELDS = ('doctor_name', 'date', 'discount_percent', 'items',
+              'subtotal', 'total_discount', 'taxable_amount', 'total_gst', 'grand_total')
+
+
+def default_cache_dir():
+    """Returns the PDF cache folder in the app data folder."""
+    return os.path.join(app_data_dir(), CACHE_FOLDER)
+
+
+def invoice_key(data):
+    """Returns the cache key of an invoice dict: a hash of everything the PDF shows."""
+    # Imported here as it adds several milliseconds to the app's start-up
+    import hashlib
+
+    normalized = {field: data.get(field) for field in KEY_FIELDS}
+    normalized['items'] = [[str(cell) for cell in row] for row in data['items']]
+    normalized['version'] = CACHE_VERSION
+    encoded = json.dumps(normalized, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode('utf-8')).hexdigest()
+
+
+class PdfCache:
+    """
+    Rendered PDFs keyed by invoice_key(), with least-recently-used eviction
+    by total size. A hit refreshes the entry's modification time, which is
+    the LRU order.
+    """
+    def __init__(self, folder=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.folder = folder or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.folder, exist_ok=True)
+        # Estimated folder size, rescanned whenever it crosses the limit
+        self._size = sum(size for _, size, _ in self._entries())
+
+    def _path(self, key):
+        return os.path.join(self.folder, key + '.pdf')
+
+    def _entries(self):
+        """Returns (path, size, mtime) for every cached PDF."""
+        entries = []
+        with os.scandir(self.folder) as it:
+            for entry in it:
+                if entry.name.endswith('.pdf'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue
+                    entries.append((entry.path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def get(self, key):
+        """Returns the path of a cached PDF and marks it recently used, or None on a miss."""
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, key, source_path):
+        """Stores a copy of a rendered PDF under `key` and returns the cached path."""
+        with atomic_output(self._path(key)) as f, open(source_path, 'rb') as source:
+            shutil.copyfileobj(source, f)
+        self._size += os.path.getsize(self._path(key))
+        if self._size > self.max_bytes:
+            self.evict()
+        return self._path(key)
+
+    def evict(self):
+        """Deletes the least recently used PDFs until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        size = sum(entry[1] for entry in entries)
+        for path, entry_size, _ in entries:
+            if size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            size -= entry_size
+        self._size = size
+
+    def render(self, build_pdf, data, path):
+        """
+        Writes the PDF for an invoice dict to `path`, copying it from the
+        cache when the same invoice was rendered before and calling
+        `build_pdf(data, path)` otherwise. Returns True on a cache hit.
+        """
+        key = invoice_key(data)
+        cached = self.get(key)
+        if cached is not None:
+            try:
+                if not (os.path.exists(path) and os.path.samefile(cached, path)):
+                    with atomic_output(path) as f, open(cached, 'rb') as source:
+                        shutil.copyfileobj(source, f)
+                return True
+            except FileNotFoundError:
+                # Evicted by another process in the meantime
+                pass
+        build_pdf(data, path)
+        try:
+            self.put(key, path)
+        except OSError:
+            # The PDF itself was written; a cache that cannot be updated is not an error
+            pass
+        return False
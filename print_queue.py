@@ -0,0 +1,114 @@
+"""
+Background print queue: PDFs are submitted to the system print command on
+a worker thread, so printing never blocks the UI, and each job's status can
+be followed while it runs.
+
+The print command is `lp` (`lpr` on macOS). Set SIMPLEINVOICE_LP to use a
+different command, e.g. the stand-in in tools/fake_lp.py for testing:
+
+    SIMPLEINVOICE_LP="python tools/fake_lp.py" python handinvoice.py
+"""
+import itertools
+import os
+import queue
+import shlex
+import sys
+import threading
+import time
+
+from instrumentation import timed
+
+# Seconds a print command may run before its job is marked failed.
+SUBMIT_TIMEOUT = 60
+
+QUEUED, PRINTING, DONE, FAILED = 'Queued', 'Printing', 'Done', 'Failed'
+
+
+def print_command():
+    """Returns the print command as an argument list, or None to use the Windows shell."""
+    override = os.environ.get('SIMPLEINVOICE_LP')
+    if override:
+        return shlex.split(override, posix=sys.platform != "win32")
+    if sys.platform == "win32":
+        return None
+    if sys.platform == "darwin":
+        return ['lpr']
+    return ['lp']
+
+
+class PrintQueue:
+    """
+    Print jobs run one at a time on a daemon worker thread. A job is a dict
+    with id, paths, status (Queued/Printing/Done/Failed), message and the
+    submit/finish times; `jobs` holds every job of the session, oldest first.
+
+    With `merge=True` all the files of a job go to a single invocation of the
+    print command, so the spooler receives them as one job; otherwise each
+    file is submitted separately.
+    """
+    def __init__(self, command=None):
+        self.command = command if command is not None else print_command()
+        self.jobs = []
+        self._ids = itertools.count(1)
+        self._queue = queue.Queue()
+        self._thread = None
+
+    def submit(self, paths, merge=False):
+        """Queues PDFs for printing and returns the new jobs."""
+        paths = [os.path.abspath(path) for path in paths]
+        groups = [paths] if merge and len(paths) > 1 else [[path] for path in paths]
+        jobs = []
+        for group in groups:
+            job = {
+                'id': next(self._ids), 'paths': group, 'status': QUEUED, 'message': '',
+                'submitted_at': time.time(), 'finished_at': None,
+            }
+            self.jobs.append(job)
+            self._queue.put(job)
+            jobs.append(job)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="print-queue", daemon=True)
+            self._thread.start()
+        return jobs
+
+    def pending(self):
+        """Returns the number of jobs not yet finished."""
+        return sum(1 for job in self.jobs if job['status'] in (QUEUED, PRINTING))
+
+    def _run(self):
+        # Imported on the worker thread, to keep it out of the app's start-up
+        import subprocess
+
+        while True:
+            job = self._queue.get()
+            job['status'] = PRINTING
+            try:
+                with timed('print.submit', files=len(job['paths'])):
+                    job['message'] = self._print(job['paths'])
+                job['status'] = DONE
+            except (OSError, subprocess.SubprocessError) as e:
+                job['message'] = str(e)
+                job['status'] = FAILED
+            job['finished_at'] = time.time()
+
+    def _print(self, paths):
+        """Runs the print command for some files; returns its output (e.g. the spooler's job id)."""
+        import subprocess
+
+        missing = [path for path in paths if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"No such file: {missing[0]}")
+        if self.command is None:
+            for path in paths:
+                os.startfile(path, "print")
+            return "Sent to the default printer"
+
+        # An argument list rather than a shell string, so paths with spaces are safe
+        result = subprocess.run(
+            self.command + paths, capture_output=True, text=True, timeout=SUBMIT_TIMEOUT
+        )
+        if result.returncode != 0:
+            raise subprocess.SubprocessError(
+                (result.stderr or result.stdout).strip() or f"{self.command[0]} exited with status {result.returncode}"
+            )
+        return result.stdout.strip()
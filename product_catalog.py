@@ -0,0 +1,202 @@
+"""
+Local product catalog with an in-memory prefix index, used to suggest
+products as the user types and fill in their packing, batch, rate and GST.
+
+The catalog is a CSV file (products.csv in the app data folder) with the
+columns product, packing, batch_no, rate and gst.
+"""
+import csv
+import io
+import os
+from bisect import bisect_left, insort
+
+from invoice_core import app_data_dir
+
+CATALOG_FILENAME = 'products.csv'
+CATALOG_FIELDS = ('product', 'packing', 'batch_no', 'rate', 'gst')
+
+# Bytes before the end of the last read that must be unchanged for the
+# file to count as appended to (rather than rewritten).
+TAIL_CHECK_BYTES = 256
+
+
+def default_catalog_path():
+    """Returns the path of the product catalog in the app data folder."""
+    return os.path.join(app_data_dir(), CATALOG_FILENAME)
+
+
+def _record(row):
+    """Returns a catalog record from a CSV row, or None if it has no product name."""
+    name = (row.get('product') or '').strip()
+    if not name:
+        return None
+    record = {field: (row.get(field) or '').strip() for field in CATALOG_FIELDS}
+    record['product'] = name
+    return record
+
+
+class ProductCatalog:
+    """
+    Products keyed by lower-cased name, with the keys kept in a sorted list so
+    a prefix lookup is a bisect plus a short scan, O(log n + matches).
+
+    Changes to the catalog file are picked up without restarting: rows
+    appended to the file are read and inserted incrementally, and any other
+    change reloads the whole file and swaps the index in one assignment.
+    `read_changes()` does the file reading, parsing and index building and
+    never touches the index, so it can run on a background thread;
+    `apply()` then installs the result cheaply on the thread that reads the
+    catalog. `refresh()` does both.
+
+    A last line without a newline is included, but read again next time, in
+    case it was only partly written.
+    """
+    def __init__(self, path=None):
+        self.path = path or default_catalog_path()
+        # (products by key, sorted keys), replaced as a whole on a full load
+        self._index = ({}, [])
+        self._signature = None
+        self._fieldnames = list(CATALOG_FIELDS)
+        # Where the complete lines read so far end, and the bytes just before that
+        self._offset = 0
+        self._tail = b''
+        # (key, record it replaced or None) for a record read from an unterminated last line
+        self._partial = None
+
+    def __len__(self):
+        return len(self._index[0])
+
+    def get(self, name):
+        """Returns the record for an exact product name (case-insensitive), or None."""
+        return self._index[0].get(name.strip().lower())
+
+    def suggest(self, prefix, limit=10):
+        """Returns up to `limit` records whose names start with `prefix`, in name order."""
+        products, keys = self._index
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        matches = []
+        for i in range(bisect_left(keys, prefix), len(keys)):
+            key = keys[i]
+            if not key.startswith(prefix) or len(matches) >= limit:
+                break
+            matches.append(products[key])
+        return matches
+
+    def upsert(self, record):
+        """Adds or replaces one product in place."""
+        products, keys = self._index
+        key = record['product'].lower()
+        if key not in products:
+            insort(keys, key)
+        products[key] = record
+
+    def refresh(self):
+        """
+        Brings the catalog up to date with its file. Returns True if anything
+        was (re)loaded.
+        """
+        update = self.read_changes()
+        if update is None:
+            return False
+        self.apply(update)
+        return True
+
+    def read_changes(self):
+        """
+        Reads what changed in the catalog file since the last applied update.
+        Returns an update for apply(), or None if the file is unchanged.
+        Call apply() before reading the next changes.
+        """
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            if self._signature is None:
+                return None
+            return {'signature': None, 'index': ({}, []), 'records': None, 'partial': None,
+                    'fieldnames': list(CATALOG_FIELDS), 'offset': 0, 'tail': b''}
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return None
+
+        update = {'signature': signature, 'index': None, 'records': None, 'fieldnames': self._fieldnames}
+        with open(self.path, 'rb') as f:
+            if self._offset and stat.st_size >= self._offset and self._tail_unchanged(f):
+                f.seek(self._offset)
+                appended = f.read()
+                end = appended.rfind(b'\n') + 1
+                update['records'] = list(self._parse(appended[:end], self._fieldnames))
+                update['partial'] = self._parse_partial(appended[end:], self._fieldnames)
+                offset = self._offset + end
+            else:
+                data = f.read()
+                newline = data.find(b'\n')
+                header_line = data[:newline + 1] if newline >= 0 else data
+                fieldnames = next(csv.reader(io.StringIO(header_line.decode('utf-8-sig'))), [])
+                end = max(data.rfind(b'\n') + 1, len(header_line))
+                products = {}
+                for record in self._parse(data[len(header_line):end], fieldnames):
+                    products[record['product'].lower()] = record
+                update.update(index=(products, sorted(products)), fieldnames=fieldnames,
+                              partial=self._parse_partial(data[end:], fieldnames))
+                offset = end
+            update['offset'] = offset
+            start = max(0, offset - TAIL_CHECK_BYTES)
+            f.seek(start)
+            update['tail'] = f.read(offset - start)
+        return update
+
+    def apply(self, update):
+        """Installs an update from read_changes(): an index swap, or a few upserts for appended rows."""
+        if update['index'] is not None:
+            self._index = update['index']
+            self._partial = None
+        else:
+            self._undo_partial()
+            for record in update['records']:
+                self.upsert(record)
+        partial = update['partial']
+        if partial is not None:
+            key = partial['product'].lower()
+            self._partial = (key, self._index[0].get(key))
+            self.upsert(partial)
+        self._signature, self._fieldnames = update['signature'], update['fieldnames']
+        self._offset, self._tail = update['offset'], update['tail']
+
+    def _undo_partial(self):
+        """Takes back the record read from an unterminated last line, before that line is read again."""
+        if self._partial is None:
+            return
+        (key, replaced), self._partial = self._partial, None
+        products, keys = self._index
+        if replaced is not None:
+            products[key] = replaced
+        elif products.pop(key, None) is not None:
+            del keys[bisect_left(keys, key)]
+
+    def _tail_unchanged(self, f):
+        """Returns True if the bytes just before the last read position are as they were."""
+        start = max(0, self._offset - TAIL_CHECK_BYTES)
+        f.seek(start)
+        return f.read(self._offset - start) == self._tail
+
+    @staticmethod
+    def _parse(data, fieldnames):
+        """Yields catalog records from CSV bytes without a header line."""
+        for row in csv.DictReader(io.StringIO(data.decode('utf-8-sig')), fieldnames=fieldnames):
+            record = _record(row)
+            if record is not None:
+                yield record
+
+    @classmethod
+    def _parse_partial(cls, data, fieldnames):
+        """Returns the record on an unterminated last line, or None if there is none or it cannot be read yet."""
+        if not data.strip():
+            return None
+        try:
+            return next(cls._parse(data, fieldnames), None)
+        except (UnicodeDecodeError, csv.Error):
+            # Cut off in the middle of a character or a quoted field
+            return None
@@ -0,0 +1,7 @@
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+# Keep the app's autosave, catalog, cache and invoice database out of the user's data folder
+os.environ['SIMPLEINVOICE_HOME'] = tempfile.mkdtemp(prefix='simpleinvoice-tests-')
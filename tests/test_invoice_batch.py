@@ -0,0 +1,22 @@
+import pytest
+
+pytest.importorskip('reportlab')
+
+from invoice_batch import read_csv
+
+
+def test_read_csv_skips_leading_blank_and_comment_lines(tmp_path):
+    path = tmp_path / 'invoices.csv'
+    path.write_text(
+        "# March invoices\n"
+        "\n"
+        "invoice_id,doctor_name,date,product,qty,rate,gst\n"
+        "1001,Dr. A,01-03-2025,Aspirin,2,12.50,12\n"
+        "1001,Dr. A,01-03-2025,Brufen,1,20.00,12\n",
+        encoding='utf-8',
+    )
+    invoices = list(read_csv(str(path)))
+    assert [invoice_id for invoice_id, _ in invoices] == ['1001']
+    record = invoices[0][1]
+    assert record['doctor_name'] == "Dr. A"
+    assert [item['product'] for item in record['items']] == ["Aspirin", "Brufen"]
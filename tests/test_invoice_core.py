@@ -0,0 +1,118 @@
+import os
+import stat
+from decimal import Decimal
+
+import pytest
+
+import invoice_core
+from invoice_core import (
+    LineItemStore, atomic_output, column_amounts, compute_totals, format_amount, gst_breakdown, line_amounts,
+    make_invoice_data, parse_amount, parse_decimal, parse_item_table, table_rows,
+)
+
+
+def test_import_header_follows_blank_and_comment_rows():
+    text = "\n# exported from the stock sheet\nProduct Name,Qty,Rate,GST %\nAspirin,2,12.50,12\n"
+    items, errors = parse_item_table(table_rows(text))
+    assert errors == []
+    assert items == [{'product': "Aspirin", 'qty': '2', 'rate': '12.50', 'gst': '12'}]
+
+
+def test_import_without_header_uses_grid_order():
+    items, errors = parse_item_table(table_rows("\nAspirin\t10x10\tA1\t2\t0\t12.50\t12\n"))
+    assert errors == []
+    assert items[0]['batch_no'] == "A1" and items[0]['rate'] == "12.50"
+
+
+def test_the_first_line_decides_the_delimiter():
+    # A CSV file with a tab inside a quoted cell further down
+    items, errors = parse_item_table(table_rows('Product,Qty,Rate\nAspirin,2,12.50\n"Vit D\t1000 IU",1,30\n'))
+    assert errors == []
+    assert [item['product'] for item in items] == ["Aspirin", "Vit D\t1000 IU"]
+
+    # A spreadsheet paste, after a comment, with commas inside cells
+    items, errors = parse_item_table(table_rows("# copied, from the sheet\nVitamin D, 1000 IU\t1x10, strip\tB1\t2\t0\t30\t5\n"))
+    assert errors == []
+    assert [(item['product'], item['packing'], item['qty']) for item in items] == [("Vitamin D, 1000 IU", "1x10, strip", '2')]
+
+
+@pytest.mark.skipif(os.name != 'posix', reason="POSIX permission bits")
+def test_atomic_output_uses_the_umask_mode(tmp_path):
+    path = tmp_path / 'out.bin'
+    with atomic_output(str(path)) as f:
+        f.write(b'data')
+    assert path.read_bytes() == b'data'
+    assert stat.S_IMODE(path.stat().st_mode) == 0o666 & ~invoice_core._UMASK
+    assert os.listdir(tmp_path) == ['out.bin']
+
+
+@pytest.mark.parametrize('text, paise', [
+    ('0.005', 1), ('0.00499', 0), ('-0.005', -1), ('2.675', 268), ('1.015', 102), ('1.0149999', 101),
+])
+def test_amounts_round_half_away_from_zero(text, paise):
+    assert parse_amount(text) == paise
+
+
+@pytest.mark.parametrize('text', [
+    '12', '123.45', '-3.50', ' 7.5 ', '0.015', '1.15', '1e2', '2.5E-1', '1_000', '\u0661\u0662', '123456789012.34',
+    '999999999999999', '9999999999999.99', '1234567890123456', '0.000000000001', '1e300', '-0', '',
+    'nan', 'inf', '1e400', 'abc', '1.2.3',
+])
+def test_plain_cells_parse_like_decimal(text):
+    invoice_core.clear_parse_cache()
+    number = parse_decimal(text)
+    try:
+        expected = Decimal(text or 0)
+    except ArithmeticError:
+        expected = None
+    if expected is None or not expected.is_finite() or abs(expected.adjusted()) > invoice_core.MAX_EXPONENT:
+        assert number is None
+    else:
+        assert number[1] > 0 and Decimal(number[0]) / number[1] == expected
+
+
+def test_gst_rates_written_differently_are_one_rate():
+    parts = gst_breakdown([('12', 1000), ('12.00', 2000), ('5', 1000)], '0')
+    assert sorted(parts) == [5.0, 12.0] and parts[12.0]['subtotal'] == 3000
+
+
+def test_line_amounts_round_value_then_gst():
+    # 3 x 0.125 = 0.375 -> 0.38; GST 5% of 0.38 = 0.019 -> 0.02
+    assert line_amounts(parse_decimal('3'), parse_decimal('0.125'), parse_decimal('5')) == (38, 2)
+    # GST of exactly half a paisa rounds up: 5% of 0.10 = 0.005
+    assert line_amounts(parse_decimal('1'), parse_decimal('0.10'), parse_decimal('5')) == (10, 1)
+    # Halves round away from zero for returns too
+    assert line_amounts(parse_decimal('-3'), parse_decimal('0.125'), parse_decimal('5')) == (-38, -2)
+
+
+def test_rows_with_a_cell_that_is_not_a_number_count_as_zero():
+    qtys, rates, gsts = (
+        [parse_decimal(text) for text in column]
+        for column in (['2', 'x', '1.5', '4'], ['10.50', '3', '2.25', '1'], ['12', '5', '5', '??'])
+    )
+    assert column_amounts(qtys, rates, gsts) == ([2100, 0, 338, 0], [252, 0, 17, 0])
+
+
+def test_discount_is_rounded_before_gst_is_scaled():
+    # Discount 10% of 0.05 = 0.005 -> 0.01, leaving 0.04 taxable; GST is then
+    # 0.05 x 0.04 / 0.05 = 0.04, not 0.05 x 90% = 0.045 -> 0.05
+    assert compute_totals(5, 5, '10') == {
+        'subtotal': 5, 'total_discount': 1, 'taxable_amount': 4, 'total_gst': 4, 'grand_total': 8,
+    }
+
+
+def test_line_amounts_add_up_to_the_totals():
+    store = LineItemStore()
+    store.extend(
+        {'product': f"P{i}", 'qty': str(1 + i % 4), 'rate': f"{i * 1.37 + 0.005:.3f}", 'gst': ('5', '12', '18')[i % 3]}
+        for i in range(200)
+    )
+    data = make_invoice_data(store, "Dr. A", "01-10-2025", '0')
+    assert sum(parse_amount(row[8]) for row in data['items']) == parse_amount(data['subtotal'])
+    assert sum(parse_amount(row[9]) for row in data['items']) == parse_amount(data['grand_total'])
+
+    # With a discount, the per-rate parts still add up to the invoice
+    data = make_invoice_data(store, "Dr. A", "01-10-2025", '7.5')
+    parts = gst_breakdown(((row[7], parse_amount(row[8])) for row in data['items']), '7.5').values()
+    for name in ('subtotal', 'total_discount', 'taxable_amount', 'total_gst', 'grand_total'):
+        assert format_amount(sum(part[name] for part in parts)) == data[name]
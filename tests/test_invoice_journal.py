@@ -0,0 +1,29 @@
+from invoice_journal import AutosaveJournal
+
+
+def test_other_tabs_are_recovered_unless_saved(tmp_path):
+    journal = AutosaveJournal(str(tmp_path))
+    journal.recover()
+    journal.start()
+    journal.record('header', key='doctor_name', value="Dr. Active")
+    journal.record_tabs([
+        {'title': "Dr. Saved", 'packed': b'saved-invoice', 'saved': True},
+        {'title': "Dr. Unsaved", 'packed': b'\x00unsaved\xff', 'saved': False},
+    ])
+    journal.close()
+
+    recovered = AutosaveJournal(str(tmp_path))
+    assert recovered.recover()['doctor_name'] == "Dr. Active"
+    assert recovered.recover_tabs() == [{'title': "Dr. Unsaved", 'packed': b'\x00unsaved\xff', 'saved': False}]
+
+
+def test_start_replaces_the_tabs_of_the_last_session(tmp_path):
+    journal = AutosaveJournal(str(tmp_path))
+    journal.start()
+    journal.record_tabs([{'title': "Dr. A", 'packed': b'a', 'saved': False}])
+    journal.close()
+
+    journal = AutosaveJournal(str(tmp_path))
+    journal.start()
+    journal.close()
+    assert AutosaveJournal(str(tmp_path)).recover_tabs() == []
@@ -0,0 +1,33 @@
+import multiprocessing
+import os
+
+from invoice_numbers import FIRST_NUMBER, InvoiceNumbers
+
+
+def allocate_numbers(folder, count, block_size):
+    numbers = InvoiceNumbers(folder, block_size)
+    return [numbers.allocate() for _ in range(count)]
+
+
+def reserve_and_die(folder, block_size):
+    InvoiceNumbers(folder, block_size).allocate()
+    # Exits without running any cleanup, like a killed worker
+    os._exit(0)
+
+
+def test_concurrent_processes_never_share_a_number(tmp_path):
+    with multiprocessing.Pool(6) as pool:
+        results = pool.starmap(allocate_numbers, [(str(tmp_path), 200, block_size) for block_size in (1, 1, 7, 7, 50, 50)])
+    numbers = [number for result in results for number in result]
+    assert len(numbers) == len(set(numbers)) == 1200
+    # Each process sees its own numbers in increasing order
+    assert all(result == sorted(result) for result in results)
+
+
+def test_a_block_left_by_a_dead_process_is_skipped(tmp_path):
+    process = multiprocessing.Process(target=reserve_and_die, args=(str(tmp_path), 10))
+    process.start()
+    process.join()
+    assert process.exitcode == 0
+    numbers = InvoiceNumbers(str(tmp_path))
+    assert [numbers.allocate(), numbers.allocate()] == [FIRST_NUMBER + 10, FIRST_NUMBER + 11]
@@ -0,0 +1,112 @@
+import io
+import re
+
+import pytest
+
+pytest.importorskip('reportlab')
+
+from reportlab.lib.pagesizes import letter
+from reportlab.platypus import PageBreak, SimpleDocTemplate
+
+from invoice_core import invoice_from_record, parse_amount
+from invoice_pdf import InvoiceTemplate
+
+
+def sample_invoice(items, discount_percent='0'):
+    return invoice_from_record({
+        'doctor_name': "Dr. Test",
+        'date': "01-10-2025",
+        'discount_percent': discount_percent,
+        'items': [
+            {'product': f"Product {i}", 'packing': "10x10", 'batch_no': f"B{i:05d}",
+             'qty': str(1 + i % 7), 'rate': f"{10 + i % 50}.50", 'gst': '12'}
+            for i in range(items)
+        ],
+    })
+
+
+def wrapped_invoice(items):
+    data = sample_invoice(items)
+    for row in data['items']:
+        row[1] += "\nline two\nline three"
+    return data
+
+
+def page_count(pdf):
+    return len(re.findall(rb'/Type /Page\b', pdf))
+
+
+# Item counts where the totals or the Carried forward row only just fit on a
+# page, so platypus postpones a spacer to the next page.
+@pytest.mark.parametrize('items', [28, 58, 59, 63])
+@pytest.mark.parametrize('discount_percent', ['0', '5'])
+def test_template_renders_the_same_invoice_twice(items, discount_percent):
+    template = InvoiceTemplate()
+    data = sample_invoice(items, discount_percent)
+    pdfs = []
+    for _ in range(2):
+        buffer = io.BytesIO()
+        template.render(data, buffer)
+        pdfs.append(buffer.getvalue())
+    assert all(pdf.startswith(b'%PDF') for pdf in pdfs)
+    assert page_count(pdfs[0]) == page_count(pdfs[1]) >= 1
+
+
+def test_build_to_path_matches_build_to_file(tmp_path):
+    from invoice_pdf import build_invoice_pdf
+    data = sample_invoice(40)
+    buffer = io.BytesIO()
+    build_invoice_pdf(data, buffer)
+    path = tmp_path / 'invoice.pdf'
+    build_invoice_pdf(data, str(path))
+    assert page_count(path.read_bytes()) == page_count(buffer.getvalue()) == 2
+    assert [p.name for p in tmp_path.iterdir()] == ['invoice.pdf']
+
+
+def streamed_pages(template, data):
+    """Returns the rows of each streamed items table, checking that every table fits on its page."""
+    doc = SimpleDocTemplate(io.BytesIO(), pagesize=letter)
+    header_height = template.measure_rows()[0]
+    first_room = template.page_room(doc, template._flowables_height(template.header_flowables(data), doc))
+    pages = []
+    for flowable in template.streamed_items(data['items'], first_room, template.page_room(doc)):
+        if isinstance(flowable, PageBreak):
+            continue
+        room = first_room if not pages else template.page_room(doc)
+        assert flowable.wrap(doc.width, doc.height)[1] <= room + header_height
+        pages.append(flowable._cellvalues[1:])
+    return pages
+
+
+@pytest.mark.parametrize('make_invoice', [sample_invoice, wrapped_invoice])
+def test_each_page_carries_the_running_totals_forward(make_invoice):
+    data = make_invoice(120)
+    pages = streamed_pages(InvoiceTemplate(), data)
+    assert len(pages) > 2
+    items = []
+    forward = [0, 0]
+    for number, rows in enumerate(pages):
+        if number:
+            assert rows[0][1] == "Brought forward"
+            assert [parse_amount(value) for value in rows[0][8:]] == forward
+            rows = rows[1:]
+        if number < len(pages) - 1:
+            assert rows[-1][1] == "Carried forward"
+            carried = [parse_amount(value) for value in rows[-1][8:]]
+            rows = rows[:-1]
+        items.extend(rows)
+        for row in rows:
+            forward = [forward[0] + parse_amount(row[8]), forward[1] + parse_amount(row[9])]
+        if number < len(pages) - 1:
+            assert carried == forward
+    assert items == data['items']
+    assert forward[0] == parse_amount(data['subtotal'])
+
+
+def test_wrapped_rows_get_a_page_per_table():
+    template = InvoiceTemplate()
+    data = wrapped_invoice(120)
+    buffer = io.BytesIO()
+    template.render(data, buffer)
+    # No table was split by platypus, which would leave a forward row mid-page
+    assert page_count(buffer.getvalue()) == len(streamed_pages(template, data))
@@ -0,0 +1,93 @@
+import http.client
+import threading
+import time
+
+import pytest
+
+pytest.importorskip('reportlab')
+
+from invoice_pdf import InvoiceTemplate
+from invoice_service import ServiceMetrics, make_server
+
+
+@pytest.fixture(scope='module')
+def server():
+    server = make_server(port=0, workers=1, queue_size=0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+    server.service.shutdown()
+
+
+def post(server, path, body, headers):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=30)
+    connection.putrequest('POST', path)
+    for name, value in headers.items():
+        connection.putheader(name, value)
+    connection.endheaders(body)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status
+
+
+def get(server, path):
+    connection = http.client.HTTPConnection('127.0.0.1', server.server_port, timeout=30)
+    connection.request('GET', path)
+    response = connection.getresponse()
+    response.read()
+    connection.close()
+    return response.status
+
+
+@pytest.mark.parametrize('length, status', [(None, 411), ('abc', 400), ('-5', 400), ('99999999999', 413)])
+def test_bad_content_length(server, length, status):
+    headers = {} if length is None else {'Content-Length': length}
+    assert post(server, '/totals', b'', headers) == status
+
+
+def test_invalid_json_and_invalid_invoice(server):
+    assert post(server, '/totals', b'{', {'Content-Length': '1'}) == 400
+    assert post(server, '/totals', b'[]', {'Content-Length': '2'}) == 422
+
+
+def test_slot_is_released_when_the_render_finishes(server):
+    service = server.service
+    body = b'{"doctor_name": "Dr. <A> & Co", "date": "01-01-2025", "items": [{"product": "X", "qty": "1", "rate": "2"}]}'
+    assert post(server, '/pdf', body, {'Content-Length': str(len(body))}) == 200
+    # The done callback may run just after the response is sent
+    deadline = time.monotonic() + 5
+    while service.metrics.snapshot()['in_flight'] and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert service.metrics.snapshot()['in_flight'] == 0
+    assert service._slots.acquire(blocking=False)
+    service._slots.release()
+
+
+def test_doctor_name_markup_is_escaped():
+    template = InvoiceTemplate()
+    paragraph = template.header_flowables({'doctor_name': "Dr. <b>A</b> & Co", 'date': "01-01-2025"})[2]._cellvalues[0][0]
+    assert paragraph.getPlainText() == "Doctor's Name: Dr. <b>A</b> & Co"
+
+
+@pytest.mark.parametrize('samples, p95', [(1, 1), (2, 2), (20, 19), (100, 95), (101, 96)])
+def test_p95_is_the_nearest_rank(samples, p95):
+    metrics = ServiceMetrics()
+    for ms in range(samples, 0, -1):
+        metrics.record('GET /health', 200, ms / 1000)
+    assert metrics.snapshot()['latency']['GET /health']['p95_ms'] == p95
+
+
+def test_unknown_paths_share_one_metrics_bucket(server):
+    for path in ('/nope', '/also-not-here', '/nope?x=1'):
+        assert get(server, path) == 404
+    assert post(server, '/missing', b'', {'Content-Length': '0'}) == 404
+    # Requests are recorded just after the response is sent
+    deadline = time.monotonic() + 5
+    while not {'GET other', 'POST other'} <= set(server.service.metrics.snapshot()['latency']) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    endpoints = set(server.service.metrics.snapshot()['latency'])
+    assert {'GET other', 'POST other'} <= endpoints
+    assert not any('/nope' in endpoint or '/missing' in endpoint for endpoint in endpoints)
@@ -0,0 +1,66 @@
+from invoice_core import invoice_from_record
+from invoice_store import InvoiceStore
+
+
+def make_invoice(doctor, products, date="01-10-2025", discount_percent='0'):
+    return invoice_from_record({
+        'doctor_name': doctor, 'date': date, 'discount_percent': discount_percent,
+        'items': [{'product': name, 'qty': '2', 'rate': '10.50', 'gst': '12'} for name in products],
+    })
+
+
+def test_items_reload_with_their_own_spelling(tmp_path):
+    store = InvoiceStore(str(tmp_path / 'invoices.db'))
+    store.save(make_invoice("Dr. A", ["Paracetamol 500"]))
+    invoice_id = store.save(make_invoice("Dr. B", ["PARACETAMOL 500", "Cough Syrup"]))
+
+    record = store.load(invoice_id)
+    assert [item['product'] for item in record['items']] == ["PARACETAMOL 500", "Cough Syrup"]
+    # Both spellings are still found by one product search
+    assert len(store.search(product="paracetamol")) == 2
+    store.close()
+
+
+def test_regenerating_the_same_number_replaces_the_invoice_and_its_rollups(tmp_path):
+    store = InvoiceStore(str(tmp_path / 'invoices.db'))
+    store.save(make_invoice("Dr. A", ["Aspirin"]), 'Dr_A_000001.pdf')
+    invoice_id = store.save(make_invoice("Dr. A", ["Brufen", "Crocin"]), 'Dr_A_000002.pdf')
+    once = store.rollups(group_by=('day', 'doctor'))
+
+    assert store.save(make_invoice("Dr. A", ["Brufen", "Crocin"]), 'Dr_A_000002.pdf') == invoice_id
+    assert len(store.search()) == 2
+    assert store.rollups(group_by=('day', 'doctor')) == once
+
+    # Moving the invoice to another day and doctor takes it out of the old rollup rows
+    store.save(make_invoice("Dr. B", ["Brufen"], date="02-10-2025", discount_percent='5'), 'Dr_A_000002.pdf')
+    rebuilt = store.rollups(group_by=('day', 'doctor', 'gst_rate'))
+    with store.conn:
+        store.rebuild_rollups()
+    assert store.rollups(group_by=('day', 'doctor', 'gst_rate')) == rebuilt
+    assert [row['doctor'] for row in rebuilt] == ["Dr. A", "Dr. B"]
+    assert [item['product'] for item in store.load(invoice_id)['items']] == ["Brufen"]
+    store.close()
+
+
+def test_a_new_number_is_saved_as_another_invoice(tmp_path):
+    store = InvoiceStore(str(tmp_path / 'invoices.db'))
+    first_id = store.save(make_invoice("Dr. A", ["Aspirin"]), 'Dr_A_000001.pdf')
+    once = store.rollups()[0]
+    # Generating the same invoice again issues a new number, and both count in the report
+    second_id = store.save(make_invoice("Dr. A", ["Aspirin"]), 'Dr_A_000002.pdf')
+    assert second_id != first_id and len(store.search()) == 2
+    assert store.rollups()[0]['gst_amount'] == 2 * once['gst_amount']
+    assert store.conn.execute("PRAGMA user_version").fetchone()[0] == 1
+    store.close()
+
+
+def test_amounts_are_stored_in_paise(tmp_path):
+    store = InvoiceStore(str(tmp_path / 'invoices.db'))
+    invoice_id = store.save(make_invoice("Dr. A", ["Aspirin", "Brufen"], discount_percent='5'))
+    # 2 x 2 x 10.50 = 42.00, less 5% = 39.90, plus 12% GST of that = 4.79
+    assert store.search()[0]['grand_total'] == 4469
+    assert store.conn.execute(
+        "SELECT typeof(grand_total), val_excl_gst, val_incl_gst FROM invoices JOIN invoice_items ON invoice_id = id"
+        " WHERE id = ? AND position = 0", (invoice_id,)
+    ).fetchone() == ('integer', 2100, 2352)
+    store.close()
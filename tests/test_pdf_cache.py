@@ -0,0 +1,61 @@
+import os
+
+from invoice_core import invoice_from_record
+from pdf_cache import PdfCache, invoice_key
+
+
+def sample_invoice(qty='2'):
+    return invoice_from_record({
+        'doctor_name': "Dr. Test",
+        'date': "01-10-2025",
+        'discount_percent': '0',
+        'items': [{'product': "Aspirin", 'qty': qty, 'rate': '12.50', 'gst': '12'}],
+    })
+
+
+class CountingBuild:
+    """Stands in for build_invoice_pdf: writes a 100-byte file per invoice and counts the calls."""
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, data, path):
+        self.calls += 1
+        with open(path, 'wb') as f:
+            f.write(invoice_key(data)[:50].encode('ascii') * 2)
+
+
+def test_a_second_render_is_a_hit(tmp_path):
+    cache, build = PdfCache(str(tmp_path / 'cache')), CountingBuild()
+    first, second = tmp_path / 'first.pdf', tmp_path / 'second.pdf'
+    assert cache.render(build, sample_invoice(), str(first)) is False
+    assert cache.render(build, sample_invoice(), str(second)) is True
+    assert build.calls == 1
+    assert second.read_bytes() == first.read_bytes()
+
+
+def test_changed_invoice_data_is_a_miss(tmp_path):
+    cache, build = PdfCache(str(tmp_path / 'cache')), CountingBuild()
+    path = str(tmp_path / 'invoice.pdf')
+    cache.render(build, sample_invoice('2'), path)
+    assert cache.render(build, sample_invoice('3'), path) is False
+    data = sample_invoice('2')
+    data['date'] = "02-10-2025"
+    assert cache.render(build, data, path) is False
+    assert build.calls == 3
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    cache, build = PdfCache(str(tmp_path / 'cache'), max_bytes=250), CountingBuild()
+    invoices = {qty: sample_invoice(qty) for qty in ('1', '2', '3')}
+    for qty in ('1', '2'):
+        cache.render(build, invoices[qty], str(tmp_path / f'{qty}.pdf'))
+    # Entries are ordered by modification time; make '1' the older one, then use it
+    for age, qty in enumerate(('1', '2')):
+        os.utime(cache.get(invoice_key(invoices[qty])), (age, age))
+    assert cache.get(invoice_key(invoices['1'])) is not None
+
+    cache.render(build, invoices['3'], str(tmp_path / '3.pdf'))
+    assert cache.get(invoice_key(invoices['2'])) is None
+    assert cache.get(invoice_key(invoices['1'])) is not None
+    assert cache.get(invoice_key(invoices['3'])) is not None
+    assert len(os.listdir(cache.folder)) == 2
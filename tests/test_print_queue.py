@@ -0,0 +1,40 @@
+import os
+import sys
+import time
+
+from print_queue import DONE, FAILED, PrintQueue
+
+FAKE_LP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'tools', 'fake_lp.py')
+
+
+def wait_for(print_queue):
+    deadline = time.monotonic() + 30
+    while print_queue.pending() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert not print_queue.pending()
+
+
+def test_merged_single_and_missing_jobs_through_fake_lp(tmp_path, monkeypatch):
+    spool = tmp_path / 'spool'
+    monkeypatch.setenv('FAKE_LP_SPOOL', str(spool))
+    pdfs = []
+    for name in ('a.pdf', 'b.pdf', 'c.pdf'):
+        path = tmp_path / name
+        path.write_bytes(b'%PDF-1.4 ' + name.encode('ascii'))
+        pdfs.append(str(path))
+
+    print_queue = PrintQueue([sys.executable, FAKE_LP, '-d', 'Office', '-n', '2', '-o', 'media=A4'])
+    merged, = print_queue.submit(pdfs[:2], merge=True)
+    single, = print_queue.submit(pdfs[2:], merge=True)
+    missing, = print_queue.submit([str(tmp_path / 'missing.pdf')])
+    wait_for(print_queue)
+
+    assert (merged['status'], merged['message']) == (DONE, "request id is Office-1 (2 file(s))")
+    assert (single['status'], single['message']) == (DONE, "request id is Office-2 (1 file(s))")
+    assert missing['status'] == FAILED and 'missing.pdf' in missing['message']
+
+    # The option values were not taken for files
+    jobs = (spool / 'jobs.log').read_text(encoding='utf-8').splitlines()
+    assert [line.split('\t')[2:] for line in jobs] == [['Office', '2'] + pdfs[:2], ['Office', '2', pdfs[2]]]
+    assert sorted(os.listdir(spool / 'job-1')) == ['a.pdf', 'b.pdf']
+    assert os.listdir(spool / 'job-2') == ['c.pdf']
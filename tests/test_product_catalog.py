@@ -0,0 +1,38 @@
+from product_catalog import ProductCatalog
+
+HEADER = b"product,packing,batch_no,rate,gst\n"
+
+
+def test_last_row_without_newline_is_loaded(tmp_path):
+    path = tmp_path / 'products.csv'
+    path.write_bytes(HEADER + b"Aspirin,10x10,A1,12.00,12\nBrufen,10x10,B1,20.00,12")
+    catalog = ProductCatalog(str(path))
+    assert catalog.refresh()
+    assert catalog.get("brufen")['rate'] == "20.00"
+    assert len(catalog) == 2
+
+
+def test_partly_written_last_row_is_replaced_when_completed(tmp_path):
+    path = tmp_path / 'products.csv'
+    path.write_bytes(HEADER + b"Aspirin,10x10,A1,12.00,12\nPara")
+    catalog = ProductCatalog(str(path))
+    catalog.refresh()
+    assert catalog.get("para") is not None
+
+    with open(path, 'ab') as f:
+        f.write(b"cetamol 500,10x10,P1,15.00,5\n")
+    assert catalog.refresh()
+    assert catalog.get("para") is None
+    assert [record['product'] for record in catalog.suggest("p")] == ["Paracetamol 500"]
+    assert len(catalog) == 2
+
+
+def test_changes_are_read_without_touching_the_index(tmp_path):
+    path = tmp_path / 'products.csv'
+    path.write_bytes(HEADER + b"Aspirin,10x10,A1,12.00,12\n")
+    catalog = ProductCatalog(str(path))
+    update = catalog.read_changes()
+    assert len(catalog) == 0
+    catalog.apply(update)
+    assert len(catalog) == 1
+    assert catalog.read_changes() is None
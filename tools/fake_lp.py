@@ -0,0 +1,66 @@
+"""
+Stand-in for `lp` when testing printing without a printer.
+
+    SIMPLEINVOICE_LP="python tools/fake_lp.py" python handinvoice.py
+
+Takes lp's -d (destination), -n (copies) and -o (option, repeatable)
+arguments. Each call is logged as one spooled job: the files are copied into
+the spool folder (FAKE_LP_SPOOL, default: a fake_lp folder in the temp
+directory) and a line with the destination, copies and files is appended to
+its jobs.log. Prints the same "request id is ..." line as lp. Set FAKE_LP_DELAY to a number of seconds to simulate a slow spooler,
+or FAKE_LP_FAIL=1 to make every submission fail.
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+
+def parse_args(argv):
+    parser = argparse.ArgumentParser(prog='lp', description="Stand-in for lp that spools to a folder.")
+    parser.add_argument('-d', dest='destination', default='fake', help="printer to print on (default: fake)")
+    parser.add_argument('-n', dest='copies', type=int, default=1, help="number of copies")
+    parser.add_argument('-o', dest='options', action='append', default=[], help="printer option, e.g. media=A4")
+    parser.add_argument('paths', nargs='*', metavar='file')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    paths = args.paths
+    if not paths:
+        print("lp: no files given", file=sys.stderr)
+        return 1
+    if os.environ.get('FAKE_LP_FAIL'):
+        print("lp: The printer or class does not exist.", file=sys.stderr)
+        return 1
+    time.sleep(float(os.environ.get('FAKE_LP_DELAY') or 0))
+
+    spool = os.environ.get('FAKE_LP_SPOOL') or os.path.join(tempfile.gettempdir(), 'fake_lp')
+    os.makedirs(spool, exist_ok=True)
+    log_path = os.path.join(spool, 'jobs.log')
+    try:
+        with open(log_path, encoding='utf-8') as f:
+            job_id = sum(1 for _ in f) + 1
+    except FileNotFoundError:
+        job_id = 1
+
+    job_folder = os.path.join(spool, f"job-{job_id}")
+    os.makedirs(job_folder, exist_ok=True)
+    for path in paths:
+        if not os.path.isfile(path):
+            print(f'lp: Unable to access "{path}" - No such file or directory', file=sys.stderr)
+            return 1
+        shutil.copy(path, job_folder)
+    with open(log_path, 'a', encoding='utf-8') as f:
+        f.write(f"{job_id}\t{time.strftime('%Y-%m-%d %H:%M:%S')}\t{args.destination}\t{args.copies}\t"
+                + "\t".join(paths) + "\n")
+
+    print(f"request id is {args.destination}-{job_id} ({len(paths)} file(s))")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())